@@ -1,5 +1,7 @@
-from agents import Agent, ModelSettings, Runner
-from utils.model_setup import gemini_model
+from agents import Agent, ModelSettings
+from utils.agent_runner import run_agent
+from utils.model_setup import get_gemini_model
+from utils.reports import PortfolioReport, json_instructions
 from utils.search_tool import GoogleSearchTool
 
 class PortfolioAgent:
@@ -16,20 +18,38 @@ class PortfolioAgent:
     - Parse the portfolio data listing assets, quantities, purchase prices, and current values.
     - Calculate asset allocation percentages, top holdings, and diversification by sector.
     - Highlight any major concentration or diversification issues.
-    - Output a clear and structured report with these sections:
-        1. Summary
-        2. Asset Allocations
-        3. Diversification Analysis
-        4. Observations
+    - Fill in a structured report:
+        - summary: a short overview of the portfolio
+        - allocation: one line per notable allocation or top holding
+        - diversification: one line per diversification finding
+        - observations: one line per concentration issue or other observation
 
-    This output will be used by other agents, so be concise but comprehensive.
+    This output will be used by other agents, so keep each line short and factual.
     Respond in clear, professional English. No HTML.
-    """
+    """ + json_instructions(PortfolioReport)
+
+    NARRATIVE_PROMPT = """
+    You are a Portfolio Analyzer AI.
+    You will receive pre-computed portfolio metrics: totals, unrealized P&L, HHI,
+    top-N concentration, sector and asset class weights and a per-holding table.
+    These figures are exact; do not recompute or restate them differently.
+    Tickers, sectors and asset classes are already resolved; do not search to identify holdings.
+    Your task is only to write the narrative around them:
+    - Fill in a structured report:
+        - summary: a short overview of the portfolio
+        - allocation: one line per notable allocation or top holding
+        - diversification: one line per diversification finding
+        - observations: one line per concentration issue or other observation
+    - Highlight any major concentration or diversification issues.
 
-    def __init__(self, model = None, instructions = None, tools = None, model_settings = None) -> None:
-        self.model = model if model else gemini_model
+    This output will be used by other agents, so keep each line short and factual.
+    Respond in clear, professional English. No HTML.
+    """ + json_instructions(PortfolioReport)
+
+    def __init__(self, model = None, instructions = None, tools = None, model_settings = None, search_tool = None) -> None:
+        self.model = model if model else get_gemini_model()
         self.instructions = instructions if instructions else self.DEFAULT_PROMPT
-        self.search_tools = GoogleSearchTool()
+        self.search_tools = search_tool if search_tool else GoogleSearchTool()
         self.tools = tools if tools else [self.search_tools.as_tool()]
         self.model_settings = model_settings if model_settings else ModelSettings(tool_choice="required")
         self.agent = Agent(
@@ -39,9 +59,16 @@ class PortfolioAgent:
             tools = self.tools,
             model_settings = self.model_settings
         )
+        self.narrative_agent = Agent(
+            name = "Portfolio Narrative Agent",
+            instructions = self.NARRATIVE_PROMPT,
+            model = self.model
+        )
     
-    async def analyze_portfolio_async(self, portfolio_data: str) -> str:
-        result = await Runner.run(self.agent, portfolio_data)
-        return result.final_output
+    async def analyze_portfolio_async(self, portfolio_data: str, metrics: str | None = None) -> PortfolioReport:
+        """Write the narrative from pre-computed metrics when available, else analyze the raw data."""
+        if metrics:
+            return await run_agent(self.narrative_agent, metrics, output_type=PortfolioReport)
+        return await run_agent(self.agent, portfolio_data, output_type=PortfolioReport)
     
     
\ No newline at end of file
@@ -1,5 +1,7 @@
-from agents import Agent, Runner, ModelSettings
-from utils.model_setup import gemini_model
+from agents import Agent, ModelSettings
+from utils.agent_runner import run_agent
+from utils.model_setup import get_gemini_model
+from utils.reports import Recommendation, json_instructions
 from utils.search_tool import GoogleSearchTool
 
 class RecommendationAgent:
@@ -25,24 +27,24 @@ class RecommendationAgent:
     - Analyze and synthesize all of the above information.
     - Provide clear, personalized investment recommendations.
     - Include rationales and actionable next steps.
-    - Structure output into:
-        1. Personalized Suggestions
-        2. Rationales
-        3. Next Steps
+    - Fill in a structured recommendation:
+        - summary: the overall recommendation in two or three sentences
+        - suggestions: one entry per suggestion, with the action, its rationale and a priority (high, medium or low)
+        - next_steps: one line per actionable next step
 
     Use the 'google search' tool if required.
     Write in professional, concise language. No HTML.
     """
 
-    def __init__(self, model = None, instructions = None, tools = None, model_settings = None) -> None:
-        self.model = model if model else gemini_model
+    def __init__(self, model = None, instructions = None, tools = None, model_settings = None, search_tool = None) -> None:
+        self.model = model if model else get_gemini_model()
         self.instructions = instructions if instructions else self.DEFAULT_PROMPT
-        self.search_tools = GoogleSearchTool()
+        self.search_tools = search_tool if search_tool else GoogleSearchTool()
         self.tools = tools if tools else [self.search_tools.as_tool()]
         self.model_settings = model_settings if model_settings else ModelSettings(tool_choice="required")
         self.agent = Agent(
             name = "Recommendation Agent with Search",
-            instructions = self.instructions,
+            instructions = self.instructions + json_instructions(Recommendation),
             model = self.model,
             tools = self.tools,
             model_settings = self.model_settings
@@ -54,12 +56,11 @@ class RecommendationAgent:
         risk_assessment: str,
         portfolio_research: str,
         risks_research: str
-    ) -> str:
+    ) -> Recommendation:
         full_prompt = self.instructions.format(
             portfolio_summary = portfolio_summary,
             risk_assessment = risk_assessment,
             portfolio_research = portfolio_research,
             risk_research = risks_research
         )
-        result = await Runner.run(self.agent, full_prompt)
-        return result.final_output
\ No newline at end of file
+        return await run_agent(self.agent, full_prompt, output_type=Recommendation)
\ No newline at end of file
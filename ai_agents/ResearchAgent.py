@@ -1,5 +1,7 @@
-from agents import Agent, Runner, ModelSettings
-from utils.model_setup import gemini_model
+from agents import Agent, ModelSettings
+from utils.agent_runner import run_agent
+from utils.model_setup import get_gemini_model
+from utils.reports import Research, ResearchReport, json_instructions
 from utils.search_tool import GoogleSearchTool
 
 class ResearchAgent:
@@ -15,20 +17,32 @@ class ResearchAgent:
     You will receive a user query or portfolio context describing the assets of interest.
     Your tasks:
     - Use the 'google_search' tool to gather recent, authoritative financial data related to the portfolio’s assets or relevant market sectors.
-    - Summarize your findings in these sections:
-        1. Market Overview
-        2. Company Insights
-        3. Risks
-        4. Opportunities
-        5. References
+    - Summarize your findings as one item per subject (the overall market, then each company or sector):
+        - subject and a one or two sentence overview
+        - findings: one entry per fact, with its kind (development, risk or opportunity),
+          a one-sentence text and the URL of its source
 
     Maintain a professional tone and base your report solely on the search results. No HTML.
-    """
+    """ + json_instructions(ResearchReport)
+
+    SUBJECT_PROMPT = """
+    You are a Financial Research Assistant AI.
+    You will receive a single holding or sector to research.
+    Holdings come with their resolved ticker and sector, so search for news directly rather than identifying the company.
+    Your tasks:
+    - Use the 'google_search' tool to gather recent, authoritative financial news and data about it.
+    - Summarize your findings:
+        - subject: the holding or sector, and a one or two sentence overview
+        - findings: one entry per fact, with its kind (development, risk or opportunity),
+          a one-sentence text and the URL of its source
+
+    Keep it under 250 words. Base your report solely on the search results. No HTML.
+    """ + json_instructions(Research)
 
-    def __init__(self, model = None, instructions = None, tools = None, model_settings = None) -> None:
-        self.model = model if model else gemini_model
+    def __init__(self, model = None, instructions = None, tools = None, model_settings = None, search_tool = None) -> None:
+        self.model = model if model else get_gemini_model()
         self.instructions = instructions if instructions else self.DEFAULT_PROMPT
-        self.search_tools = GoogleSearchTool()
+        self.search_tools = search_tool if search_tool else GoogleSearchTool()
         self.tools = tools if tools else [self.search_tools.as_tool()]
         self.model_settings = model_settings if model_settings else ModelSettings(tool_choice="required")
         self.agent = Agent(
@@ -38,8 +52,19 @@ class ResearchAgent:
             tools = self.tools,
             model_settings = self.model_settings
         )
+        self.subject_agent = Agent(
+            name = "Research Agent per Holding",
+            instructions = self.SUBJECT_PROMPT,
+            model = self.model,
+            tools = self.tools,
+            model_settings = self.model_settings
+        )
     
-    async def research_async(self, input: str) -> str:
-        result = await Runner.run(self.agent, input)
-        return result.final_output
+    async def research_async(self, input: str) -> ResearchReport:
+        return await run_agent(self.agent, input, output_type=ResearchReport)
+
+    async def research_subject_async(self, kind: str, subject: str) -> Research:
+        """Research one holding or sector; the input carries no client-specific data so results can be shared."""
+        report = await run_agent(self.subject_agent, f"{kind.title()}: {subject}", output_type=Research)
+        return report.model_copy(update={"subject": subject})
     
\ No newline at end of file
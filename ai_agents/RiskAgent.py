@@ -1,6 +1,8 @@
 import asyncio
-from agents import Agent, ModelSettings, Runner
-from utils.model_setup import gemini_model
+from agents import Agent, ModelSettings
+from utils.agent_runner import run_agent
+from utils.model_setup import get_gemini_model
+from utils.reports import RiskReport, json_instructions
 from utils.search_tool import GoogleSearchTool
 
 class RiskAgent:
@@ -19,19 +21,25 @@ class RiskAgent:
         - Volatility exposure and potential downside risks
         - Emerging market or economic risks relevant to portfolio composition
     - Use the 'google_search' tool as needed to fetch current market volatility or risk news.
-    - Generate a detailed risk assessment report with these sections:
-        1. Summary of Key Risks
-        2. Concentration Risks
-        3. Market and Volatility Risks
-        4. Risk Mitigation Suggestions
+    - Fill in a structured risk assessment:
+        - summary: the key risks in two or three sentences
+        - risks: one entry per risk, with a short title, severity (high, medium or low),
+          category (e.g. concentration, market, volatility, macro) and a one-sentence detail
+        - mitigations: one line per risk mitigation suggestion
 
     Write clearly and concisely, assuming the portfolio summary is accurate and complete. No HTML.
+    """ + json_instructions(RiskReport)
+
+    METRICS_NOTE = """
+    When a "Quantitative Risk Metrics" section follows the summary, its figures are computed from
+    historical prices and are exact: base the volatility, VaR/CVaR, beta and correlation discussion on them
+    and only search for current market context, not for volatility figures.
     """
 
-    def __init__(self, model = None, instructions = None, tools = None, model_settings = None):
-        self.model = model if model else gemini_model
-        self.instructions = instructions if instructions else self.DEFAULT_PROMPT
-        self.search_tool = GoogleSearchTool()
+    def __init__(self, model = None, instructions = None, tools = None, model_settings = None, search_tool = None):
+        self.model = model if model else get_gemini_model()
+        self.instructions = instructions if instructions else self.DEFAULT_PROMPT + self.METRICS_NOTE
+        self.search_tool = search_tool if search_tool else GoogleSearchTool()
         self.tools = tools if tools else [self.search_tool.as_tool()]
         self.model_settings = model_settings if model_settings else ModelSettings(tool_choice="required")
         self.agent = Agent(
@@ -42,6 +50,8 @@ class RiskAgent:
             model_settings = self.model_settings
         )
     
-    async def analyze_risks_async(self, portfolio_summary: str) -> str:
-        result = await Runner.run(self.agent, portfolio_summary)
-        return result.final_output
\ No newline at end of file
+    async def analyze_risks_async(self, portfolio_summary: str, risk_metrics: str | None = None) -> RiskReport:
+        """Assess risks from the summary, grounded in the historical risk metrics when price data is available."""
+        if risk_metrics:
+            portfolio_summary = f"{portfolio_summary}\n\n## Quantitative Risk Metrics\n{risk_metrics}"
+        return await run_agent(self.agent, portfolio_summary, output_type=RiskReport)
\ No newline at end of file
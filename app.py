@@ -1,11 +1,64 @@
+import uuid
 import streamlit as st
-import tempfile
-from manager import PortfolioWorkflow
+from manager import PortfolioWorkflow, SECTIONS
+from job_service import JobService, QueueFullError
 from utils.input_converter import InputConverter
+from utils.instrumentation import get_tracer
+from utils.rate_limiter import limiter_metrics
 
-# Initialize manager and converter
-manager = PortfolioWorkflow()
-converter = InputConverter()
+# Initialize manager and converter once per server process; Streamlit reruns reuse them
+@st.cache_resource
+def get_manager() -> PortfolioWorkflow:
+    return PortfolioWorkflow()
+
+
+@st.cache_resource
+def get_converter() -> InputConverter:
+    return InputConverter()
+
+
+@st.cache_resource
+def get_job_service() -> JobService:
+    # One worker pool per server process, shared by every session
+    return JobService(workflow=get_manager())
+
+
+manager = get_manager()
+converter = get_converter()
+jobs = get_job_service()
+
+POLL_INTERVAL = 1.0
+
+
+def portfolio_id(file_name: str) -> str:
+    """Checkpoint id for an upload, scoped to this browser session so users with the same file name stay apart."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return f"{st.session_state.session_id}:{file_name}"
+
+
+def render_sections(sections: dict):
+    for section in SECTIONS.values():
+        with st.expander(section, expanded=True):
+            value = sections.get(section)
+            st.markdown(value if value else "No data available")
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def show_job(job_id: str):
+    """Poll a running job and show its sections as they stream in; rerun the page once it finishes."""
+    status = jobs.status(job_id)
+    if status is None or status["state"] not in ("queued", "running"):
+        st.rerun()
+    if status["state"] == "queued":
+        st.info(f"⏳ Queued (position {status['position']})...")
+    for section in SECTIONS.values():
+        with st.expander(section, expanded=True):
+            text = status["sections"].get(section)
+            if text:
+                st.markdown(text + (" ▌" if section in status["active"] else ""))
+            else:
+                st.markdown("_Analyzing..._" if section in status["active"] else "_Waiting for upstream agents..._")
 
 # === Page Config ===
 st.set_page_config(
@@ -32,27 +85,60 @@ uploaded_file = st.file_uploader("Upload your Portfolio File (CSV / PDF)", type=
 
 if uploaded_file:
     if uploaded_file:
-        # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp:
-            tmp.write(uploaded_file.getvalue())
-            tmp_path = tmp.name
-
-        # Convert the file into Markdown / table text
+        # Convert the uploaded bytes into Markdown / table text (cached by file digest)
         try:
-            portfolio_data = converter.convert(tmp_path)
+            portfolio_data, stats = converter.convert_with_stats(uploaded_file.getvalue(), file_type=uploaded_file.name.split('.')[-1])
             st.success("✅ File converted successfully!")
+            st.caption(
+                f"Prompt size: {stats['output_tokens']} tokens ({stats['format']}) "
+                f"vs {stats['markdown_tokens']} as markdown, {stats['saved_pct']}% smaller"
+            )
         except Exception as e:
             st.error(f"Error converting file: {e}")
             st.stop()
 
-    # Run the workflow
-    with st.spinner("Analyzing portfolio with AI agents..."):
-        results = manager.run_sync(portfolio_data)
+    job_key = f"job:{uploaded_file.file_id}"
+    job_id = st.session_state.get(job_key)
+    status = jobs.status(job_id) if job_id else None
 
-    # Display results in **expanders** with nice markdown styling
-    for section, value in results.items():
-        with st.expander(section, expanded=True):
-            st.markdown(value if value else "No data available")
+    # Identical re-uploads and reruns are served straight from the result cache
+    cached = manager.get_cached(portfolio_data)
+    if cached is not None:
+        render_sections(cached)
+    elif status is not None and status["state"] == "done":
+        render_sections(jobs.result(job_id))
+    elif status is not None and status["state"] in ("failed", "cancelled"):
+        st.error(f"Analysis {status['state']}: {status['error'] or 'no result'}")
+        render_sections(status["sections"])
+        if st.button("Retry analysis"):
+            del st.session_state[job_key]
+            st.rerun()
+    else:
+        if status is None:
+            # Re-uploads of an edited file reuse every node whose inputs did not change
+            changes = manager.diff(portfolio_data, portfolio_id=portfolio_id(uploaded_file.name))
+            try:
+                job_id = jobs.submit(portfolio_data, portfolio_id=portfolio_id(uploaded_file.name))
+            except QueueFullError as e:
+                st.warning(f"⏳ {e}")
+                st.stop()
+            st.session_state[job_key] = job_id
+            st.session_state[f"{job_key}:changes"] = changes
+        changes = st.session_state.get(f"{job_key}:changes")
+        if changes:
+            st.caption(
+                f"Since the last analysis of {uploaded_file.name}: {len(changes['added'])} added, "
+                f"{len(changes['removed'])} removed, {len(changes['changed'])} changed holdings"
+            )
+        # The workflow runs in the job service; this script run only polls it
+        show_job(job_id)
+
+    # Opt-in profiling: PORTFOLIAI_TRACE=traces.jsonl streamlit run app.py
+    tracer = get_tracer()
+    if tracer.enabled:
+        with st.expander("Performance Trace", expanded=False):
+            st.dataframe(tracer.summary(), use_container_width=True)
+            st.dataframe(limiter_metrics(), use_container_width=True)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+from manager import PortfolioWorkflow
+from utils.input_converter import InputConverter
+from utils.rate_limiter import BATCH, limiter_metrics, priority_scope
+from utils.stats import percentile
+
+SUPPORTED_EXTENSIONS = (".csv", ".pdf")
+
+
+# === Input discovery ===
+def collect_inputs(source: str) -> list[str]:
+    """Return portfolio files from a directory (recursively) or a manifest with one path per line."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return paths
+
+
+def load_completed(output_path: str) -> set[str]:
+    """Paths already written successfully to the output file, so a restart can skip them."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+# === Batch runner ===
+class BatchRunner:
+    """Runs many portfolios through PortfolioWorkflow on one event loop with bounded concurrency."""
+
+    def __init__(self, concurrency: int = 8, workflow: PortfolioWorkflow | None = None):
+        self.concurrency = concurrency
+        self.workflow = workflow if workflow else PortfolioWorkflow()
+        self.converter = InputConverter()
+
+    async def _analyze(self, path: str) -> dict:
+        start = time.perf_counter()
+        try:
+            # pdfplumber/pandas are blocking, keep them off the event loop
+            portfolio_data = await asyncio.to_thread(self.converter.convert, path)
+            # The path identifies the portfolio, so an edited file only re-runs the nodes it affects.
+            # Batch calls yield to interactive ones at the shared rate limiters.
+            with priority_scope(BATCH):
+                results = await self.workflow.run(portfolio_data, portfolio_id=path)
+            record = {"path": path, "status": "ok", "results": results}
+        except Exception as e:
+            record = {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+        record["elapsed_s"] = round(time.perf_counter() - start, 3)
+        return record
+
+    async def run(self, paths: list[str], output_path: str, resume: bool = True) -> dict:
+        completed = load_completed(output_path) if resume else set()
+        pending = [p for p in paths if p not in completed]
+
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for path in pending:
+            queue.put_nowait(path)
+
+        latencies, failures = [], 0
+        start = time.perf_counter()
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            async def worker():
+                nonlocal failures
+                while True:
+                    try:
+                        path = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._analyze(path)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    latencies.append(record["elapsed_s"])
+                    if record["status"] != "ok":
+                        failures += 1
+                    print(f"[{len(latencies)}/{len(pending)}] {record['status']:<5} {path} ({record['elapsed_s']}s)", file=sys.stderr)
+
+            try:
+                await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(pending)) or 1)))
+            finally:
+                await self.workflow.aclose()
+
+        wall = time.perf_counter() - start
+        return {
+            "total": len(paths),
+            "skipped": len(paths) - len(pending),
+            "processed": len(latencies),
+            "failed": failures,
+            "wall_time_s": round(wall, 2),
+            "throughput_per_min": round(len(latencies) / wall * 60, 2) if wall else 0.0,
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p95_s": percentile(latencies, 95),
+        }
+
+
+# === CLI Entry Point ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of portfolio files.")
+    parser.add_argument("source", help="Directory of CSV/PDF files or a manifest file listing paths")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum workflows running at once")
+    parser.add_argument("--no-resume", action="store_true", help="Re-run everything and overwrite the output file")
+    args = parser.parse_args(argv)
+
+    paths = collect_inputs(args.source)
+    runner = BatchRunner(concurrency=args.concurrency)
+    summary = asyncio.run(runner.run(paths, args.output, resume=not args.no_resume))
+
+    print("\n=== Batch Summary ===")
+    for k, v in summary.items():
+        print(f"{k}: {v}")
+
+    print("\n=== Rate Limits ===")
+    for metrics in limiter_metrics():
+        print(", ".join(f"{k}: {v}" for k, v in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
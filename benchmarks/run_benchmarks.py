@@ -0,0 +1,199 @@
+"""
+Offline benchmark for PortfoliAI.
+
+    python -m benchmarks.run_benchmarks --concurrency 1,4,16 --sizes 10,200
+
+Starts the stub Gemini and Custom Search servers, points the app at them, then measures
+PortfolioWorkflow at each (portfolio size, concurrency) pair and InputConverter over
+synthetic CSVs and PDFs. Reports throughput, p50/p95/p99 latency and peak memory.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+
+from benchmarks.stub_servers import StubLLMServer, StubSearchServer
+from benchmarks.synthetic import make_csv, make_markdown, make_pdf
+from utils.stats import percentile
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    return round(percentile(values, pct), 4)
+
+
+def _latency_stats(latencies: list[float], wall: float) -> dict:
+    return {
+        "throughput_per_s": round(len(latencies) / wall, 3) if wall else 0.0,
+        "p50_s": _percentile(latencies, 50),
+        "p95_s": _percentile(latencies, 95),
+        "p99_s": _percentile(latencies, 99),
+    }
+
+
+def configure_env(llm: StubLLMServer, search: StubSearchServer, cache_dir: str) -> None:
+    """Point the app at the stub servers. `.env` is loaded first so it cannot override them."""
+    from utils.model_setup import load_env
+
+    load_env()
+    os.environ.update({
+        "GEMINI_BASE_URL": f"{llm.url}/v1",
+        "GEMINI_API_KEY": "stub",
+        "GOOGLE_API_KEY": "stub",
+        "GOOGLE_CSE_ID": "stub",
+        "GOOGLE_SEARCH_URL": f"{search.url}/customsearch/v1",
+        "PORTFOLIAI_CACHE_DIR": cache_dir,
+        # The stubs have no quota; leaving the real limits on would benchmark the rate limiter
+        **{f"{api}_{limit}": "0" for api in ("GEMINI", "SEARCH") for limit in ("RPS", "TPM", "DAILY_QUOTA")},
+    })
+
+
+# === Workflow ===
+def _fresh_workflow(level: str):
+    """
+    A workflow with result, research and LLM caches off and its own empty search cache, so
+    one level's searches are not served from an earlier level's cache.
+    """
+    from manager import AgentRegistry, PortfolioWorkflow
+    from utils.cache import TTLCache
+    from utils.search_tool import GoogleSearchTool
+
+    workflow = PortfolioWorkflow(use_cache=False)
+    workflow.agents = AgentRegistry(search_tool=GoogleSearchTool(cache=TTLCache(f"bench_search_{level}")))
+    return workflow
+
+
+async def bench_workflow(workflow, size: int, concurrency: int, runs: int, stream: bool) -> dict:
+    portfolios = [make_markdown(size, seed=i) for i in range(runs)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, first_content = [], []
+
+    async def one(portfolio: str):
+        async with semaphore:
+            start = time.perf_counter()
+            if stream:
+                first = None
+                async for event in workflow.stream(portfolio):
+                    if first is None and event["type"] == "token":
+                        first = time.perf_counter() - start
+                if first is not None:
+                    first_content.append(first)
+            else:
+                await workflow.run(portfolio)
+            latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in portfolios))
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {"bench": "workflow", "size": size, "concurrency": concurrency, "runs": runs,
+              **_latency_stats(latencies, wall), "peak_mem_mb": round(peak / 2 ** 20, 1)}
+    if stream:
+        result["ttfc_p50_s"] = _percentile(first_content, 50)
+    return result
+
+
+# === InputConverter ===
+def bench_converter(kind: str, size: int, repeats: int) -> dict:
+    from utils.cache import TTLCache
+    from utils.input_converter import InputConverter
+
+    data = make_csv(size) if kind == "csv" else make_pdf(size, blank_every=5)
+    converter = InputConverter(cache=TTLCache(f"bench_convert_{kind}_{size}", ttl=0))
+    latencies, stats = [], None
+    start = time.perf_counter()
+    for _ in range(repeats):
+        t = time.perf_counter()
+        _, stats = converter.convert_with_stats(data, file_type=kind)
+        latencies.append(time.perf_counter() - t)
+    wall = time.perf_counter() - start
+
+    # tracemalloc slows pdfplumber down a lot, so memory is measured on a separate pass
+    tracemalloc.start()
+    converter.convert(data, file_type=kind)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    converter.close()
+    unit = "rows" if kind == "csv" else "pages"
+    return {"bench": f"convert_{kind}", "size": f"{size} {unit}", "runs": repeats,
+            **_latency_stats(latencies, wall), "peak_mem_mb": round(peak / 2 ** 20, 1),
+            "tokens_saved_pct": stats["saved_pct"]}
+
+
+def _print_table(rows: list[dict]) -> None:
+    columns = []
+    for row in rows:
+        columns += [c for c in row if c not in columns]
+    print("|".join(columns))
+    for row in rows:
+        print("|".join(str(row.get(c, "")) for c in columns))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline PortfoliAI benchmark with stub LLM and search servers.")
+    parser.add_argument("--concurrency", type=_ints, default=[1, 4, 16])
+    parser.add_argument("--sizes", type=_ints, default=[10, 200], help="Holdings per synthetic portfolio")
+    parser.add_argument("--runs", type=int, default=0, help="Workflow runs per level (default: 2x concurrency)")
+    parser.add_argument("--stream", action="store_true", help="Use PortfolioWorkflow.stream and report time to first content")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-words", type=int, default=300)
+    parser.add_argument("--search-latency", type=float, default=0.1)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--csv-rows", type=_ints, default=[1_000, 100_000])
+    parser.add_argument("--pdf-pages", type=_ints, default=[10, 100])
+    parser.add_argument("--converter-repeats", type=int, default=3)
+    parser.add_argument("--skip-workflow", action="store_true")
+    parser.add_argument("--skip-converter", action="store_true")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    llm = StubLLMServer(latency=args.llm_latency, response_words=args.llm_words).start()
+    search = StubSearchServer(latency=args.search_latency, num_results=args.search_results).start()
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configure_env(llm, search, cache_dir)
+        try:
+            if not args.skip_workflow:
+                from agents import set_tracing_disabled
+
+                set_tracing_disabled(True)
+                for size in args.sizes:
+                    for concurrency in args.concurrency:
+                        runs = args.runs or 2 * concurrency
+                        workflow = _fresh_workflow(f"{size}_{concurrency}")
+                        rows.append(asyncio.run(bench_workflow(workflow, size, concurrency, runs, args.stream)))
+                        print(rows[-1], file=sys.stderr)
+
+            if not args.skip_converter:
+                for n in args.csv_rows:
+                    rows.append(bench_converter("csv", n, args.converter_repeats))
+                    print(rows[-1], file=sys.stderr)
+                for n in args.pdf_pages:
+                    rows.append(bench_converter("pdf", n, args.converter_repeats))
+                    print(rows[-1], file=sys.stderr)
+        finally:
+            llm.stop()
+            search.stop()
+
+    print(f"\n=== Benchmark Results (LLM requests: {llm.requests}, search requests: {search.requests}) ===")
+    _print_table(rows)
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
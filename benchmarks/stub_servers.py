@@ -0,0 +1,202 @@
+"""
+Local stand-ins for the Gemini (OpenAI-compatible) and Google Custom Search APIs.
+
+Both run on ThreadingHTTPServer in a background thread with configurable latency and
+response sizes, so the pipeline can be benchmarked without network calls or API keys.
+"""
+import json
+import time
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+STREAM_CHUNK_CHARS = 24  # roughly a few tokens per streamed delta, like the real API
+
+_WORDS = "portfolio allocation sector risk exposure volatility outlook earnings growth valuation".split()
+
+
+def _text(n_words: int) -> str:
+    lines, words = ["## Summary"], []
+    for i in range(n_words):
+        words.append(_WORDS[i % len(_WORDS)])
+        if len(words) == 12:
+            lines.append(" ".join(words).capitalize() + ".")
+            words = []
+    if words:
+        lines.append(" ".join(words).capitalize() + ".")
+    lines += ["## References", "- https://example.com/report"]
+    return "\n".join(lines)
+
+
+_JSON_SHAPE = "Respond with only a JSON object of this shape"
+
+
+def _fill(shape, n_words: int):
+    """A JSON value of the given prompt shape (see utils.reports) holding about `n_words` words."""
+    if isinstance(shape, dict):
+        return {key: _fill(value, n_words // len(shape)) for key, value in shape.items()}
+    if isinstance(shape, list):
+        return [_fill(shape[0], n_words // 3) for _ in range(3)]
+    if "|" in shape:
+        return shape.split("|")[0]
+    return " ".join(_WORDS[i % len(_WORDS)] for i in range(max(3, n_words))).capitalize() + "."
+
+
+def _query(messages: list[dict]) -> str:
+    """A search query derived from the agent's input, so each holding (or portfolio) searches for something different."""
+    text = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+    first_line = next((line.strip(" |#") for line in text.splitlines() if line.strip(" |#-")), "")
+    return f"{first_line[:80]} outlook {zlib.crc32(text.encode()) % 10_000:04d}"
+
+
+def _structured_text(messages: list[dict], n_words: int) -> str | None:
+    """JSON content when the system prompt asks for a JSON object, else None."""
+    system = next((str(m.get("content") or "") for m in messages if m.get("role") == "system"), "")
+    if _JSON_SHAPE not in system:
+        return None
+    shape = json.loads(system.split(_JSON_SHAPE, 1)[1].split("\n")[1])
+    return json.dumps(_fill(shape, n_words))
+
+
+class StubServer:
+    """Base class: serves `handler_cls` on 127.0.0.1 with an ephemeral port."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._count()
+                time.sleep(stub.latency)
+                stub.handle_get(self)
+
+            def do_POST(self):
+                stub._count()
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(stub.latency)
+                stub.handle_post(self, json.loads(body or b"{}"))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _send_json(handler, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle_get(self, handler) -> None:
+        self._send_json(handler, {"error": "not found"}, 404)
+
+    def handle_post(self, handler, payload: dict) -> None:
+        self._send_json(handler, {"error": "not found"}, 404)
+
+
+class StubLLMServer(StubServer):
+    """
+    Minimal OpenAI-compatible /chat/completions endpoint.
+    When tools are offered and no tool result is in the conversation yet it answers with a
+    google_search tool call for a query derived from the user message, otherwise with `response_words` words of markdown text, or with
+    a JSON object of the requested shape when the system prompt asks for one.
+    Supports `stream: true` (SSE chunks) as used by Runner.run_streamed.
+    """
+
+    def __init__(self, latency: float = 0.5, response_words: int = 300):
+        super().__init__(latency)
+        self.response_words = response_words
+
+    def handle_post(self, handler, payload: dict) -> None:
+        if not urlparse(handler.path).path.endswith("/chat/completions"):
+            return super().handle_post(handler, payload)
+
+        messages = payload.get("messages", [])
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        wants_tool = payload.get("tools") and not any(m.get("role") == "tool" for m in messages)
+        model = payload.get("model", "stub")
+
+        if wants_tool:
+            tool_call = {
+                "id": f"call_{self.requests}",
+                "type": "function",
+                "function": {"name": "google_search", "arguments": json.dumps({"query": _query(messages)})},
+            }
+            message, finish, completion_tokens = {"role": "assistant", "content": None, "tool_calls": [tool_call]}, "tool_calls", 20
+        else:
+            content = _structured_text(messages, self.response_words) or _text(self.response_words)
+            message, finish, completion_tokens = {"role": "assistant", "content": content}, "stop", len(content) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        if not payload.get("stream"):
+            self._send_json(handler, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                "usage": usage,
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.end_headers()
+
+        def send(choices, **extra):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices, **extra}
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            handler.wfile.flush()
+
+        if wants_tool:
+            call = dict(message["tool_calls"][0], index=0)
+            send([{"index": 0, "delta": {"role": "assistant", "tool_calls": [call]}, "finish_reason": None}])
+        else:
+            content = message["content"]
+            for i in range(0, len(content), STREAM_CHUNK_CHARS):
+                send([{"index": 0, "delta": {"role": "assistant", "content": content[i:i + STREAM_CHUNK_CHARS]}, "finish_reason": None}])
+        send([{"index": 0, "delta": {}, "finish_reason": finish}])
+        send([], usage=usage)
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+
+class StubSearchServer(StubServer):
+    """Fake Google Custom Search endpoint returning `num_results` items of `snippet_words` words."""
+
+    def __init__(self, latency: float = 0.2, num_results: int = 5, snippet_words: int = 40):
+        super().__init__(latency)
+        self.num_results = num_results
+        self.snippet_words = snippet_words
+
+    def handle_get(self, handler) -> None:
+        query = parse_qs(urlparse(handler.path).query).get("q", [""])[0]
+        snippet = " ".join(_WORDS[i % len(_WORDS)] for i in range(self.snippet_words))
+        self._send_json(handler, {"items": [
+            {"title": f"{query} result {i}", "snippet": snippet, "link": f"https://example.com/{i}"}
+            for i in range(self.num_results)
+        ]})
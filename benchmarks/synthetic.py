@@ -0,0 +1,80 @@
+"""Synthetic broker statements (CSV and ruled-table PDF) for benchmarking InputConverter and the workflow."""
+import random
+
+HEADER = ["Asset", "Sector", "Quantity", "Purchase Price", "Current Value"]
+_SECTORS = ["Technology", "Financials", "Energy", "Healthcare", "Consumer", "Industrials", "Utilities"]
+
+
+def make_holdings(n_rows: int, seed: int = 0) -> list[list[str]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_rows):
+        qty = rng.randint(1, 500)
+        price = round(rng.uniform(10, 3000), 2)
+        value = round(qty * price * rng.uniform(0.6, 1.6), 2)
+        rows.append([f"Company {i:05d}", _SECTORS[i % len(_SECTORS)], str(qty), str(price), str(value)])
+    return rows
+
+
+def make_csv(n_rows: int, seed: int = 0) -> bytes:
+    lines = [",".join(HEADER)] + [",".join(r) for r in make_holdings(n_rows, seed)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def make_markdown(n_rows: int, seed: int = 0) -> str:
+    rows = [HEADER] + make_holdings(n_rows, seed)
+    lines = ["| " + " | ".join(r) + " |" for r in rows]
+    lines.insert(1, "|" + "---|" * len(HEADER))
+    return "\n".join(lines)
+
+
+def make_pdf(n_pages: int, rows_per_page: int = 30, blank_every: int = 0, seed: int = 0) -> bytes:
+    """
+    Build a PDF whose pages each hold one ruled table (so pdfplumber's default
+    line-based finder detects it). Every `blank_every`-th page is text-only.
+    """
+    holdings = make_holdings(n_pages * rows_per_page, seed)
+    col_w, row_h, left, top = 110, 16, 20, 800
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in once the kids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for p in range(n_pages):
+        ops = []
+        if blank_every and (p + 1) % blank_every == 0:
+            ops.append(f"BT /F1 10 Tf {left} {top} Td (Notes and disclosures page {p + 1}) Tj ET")
+        else:
+            rows = [HEADER] + holdings[p * rows_per_page:(p + 1) * rows_per_page]
+            width, height = col_w * len(HEADER), row_h * len(rows)
+            for r in range(len(rows) + 1):
+                y = top - r * row_h
+                ops.append(f"{left} {y} m {left + width} {y} l S")
+            for c in range(len(HEADER) + 1):
+                x = left + c * col_w
+                ops.append(f"{x} {top} m {x} {top - height} l S")
+            for r, row in enumerate(rows):
+                for c, cell in enumerate(row):
+                    ops.append(f"BT /F1 8 Tf {left + c * col_w + 3} {top - (r + 1) * row_h + 5} Td ({cell}) Tj ET")
+        stream = "\n".join(ops).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
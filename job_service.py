@@ -0,0 +1,208 @@
+"""
+Local background job service around PortfolioWorkflow.
+
+A single event loop runs in a daemon thread, and a fixed pool of worker tasks drains a
+bounded queue of jobs. Callers on any thread submit a portfolio, get a job ID back
+immediately, and then poll `status` / `result`. Sections are filled in as the workflow
+streams, so a poller can show partial output. When the queue is full, `submit` raises
+QueueFullError instead of accepting more work.
+"""
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+
+from manager import PortfolioWorkflow
+from utils.model_setup import setting
+
+JOB_WORKERS = setting("JOB_WORKERS", 4, int)
+JOB_QUEUE_DEPTH = setting("JOB_QUEUE_DEPTH", 32, int)
+JOB_RETENTION = setting("JOB_RETENTION", 3600)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class QueueFullError(RuntimeError):
+    """Raised by `submit` when the queue already holds `max_queue` jobs."""
+
+
+class Job:
+    def __init__(self, portfolio_data: str, portfolio_id: str | None):
+        self.id = uuid.uuid4().hex[:12]
+        self.portfolio_data = portfolio_data
+        self.portfolio_id = portfolio_id
+        self.state = QUEUED
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.sections: dict[str, str] = {}
+        self.active: set[str] = set()
+        self.results = None
+        self.error = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "sections": dict(self.sections),
+            "active": sorted(self.active),
+            "error": self.error,
+        }
+
+
+class JobService:
+    def __init__(
+        self,
+        workflow: PortfolioWorkflow | None = None,
+        workers: int = JOB_WORKERS,
+        max_queue: int = JOB_QUEUE_DEPTH,
+        retention: float = JOB_RETENTION,
+    ):
+        self.workflow = workflow if workflow else PortfolioWorkflow()
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._inflight: dict[tuple, str] = {}  # (portfolio_id, data) -> job id, to coalesce duplicate submits
+        self._queued = 0
+        self._lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), name="portfoliai-jobs", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    # --- Event loop thread ---
+    def _serve(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._workers = [self._loop.create_task(self._worker()) for _ in range(self.workers)]
+        ready.set()
+        self._loop.run_forever()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            with self._lock:
+                self._queued -= 1
+            if job.state == CANCELLED:
+                continue
+            job.state, job.started_at = RUNNING, time.time()
+            # Run in its own task so `cancel` stops this job without stopping the worker
+            job.task = asyncio.ensure_future(self._run(job))
+            try:
+                await job.task
+                job.state = DONE
+            except asyncio.CancelledError:
+                job.state = CANCELLED
+                if asyncio.current_task().cancelling():
+                    raise  # the service itself is shutting down
+            except Exception as e:
+                job.state, job.error = FAILED, f"{type(e).__name__}: {e}"
+            finally:
+                job.task = None
+                job.finished_at = time.time()
+                job.active.clear()
+                self._finish(job)
+
+    async def _run(self, job: Job) -> None:
+        async for event in self.workflow.stream(job.portfolio_data, portfolio_id=job.portfolio_id):
+            section = event.get("section")
+            if event["type"] == "node_start" and section:
+                job.active.add(section)
+            elif event["type"] == "token" and section:
+                job.sections[section] = job.sections.get(section, "") + event["text"]
+            elif event["type"] == "node_end" and section:
+                job.active.discard(section)
+                job.sections[section] = event["output"] or ""
+            elif event["type"] == "done":
+                job.results = event["results"]
+
+    def _finish(self, job: Job) -> None:
+        with self._lock:
+            self._inflight.pop((job.portfolio_id, job.portfolio_data), None)
+            self.stats[{DONE: "completed", FAILED: "failed", CANCELLED: "cancelled"}[job.state]] += 1
+            job.portfolio_data = None  # the input is no longer needed once the job has finished
+            self._evict()
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    # --- Public API (any thread) ---
+    def submit(self, portfolio_data: str, portfolio_id: str | None = None) -> str:
+        """Queue a portfolio for analysis and return its job ID; an identical pending job is reused."""
+        with self._lock:
+            existing = self._inflight.get((portfolio_id, portfolio_data))
+            if existing is not None:
+                return existing
+            if self._queued >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queue} waiting); try again shortly.")
+            job = Job(portfolio_data, portfolio_id)
+            self._jobs[job.id] = job
+            self._inflight[(portfolio_id, portfolio_data)] = job.id
+            self._queued += 1
+            self.stats["submitted"] += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job.id
+
+    def status(self, job_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        status = job.to_dict()
+        if job.state == QUEUED:
+            with self._lock:
+                waiting = [j for j in self._jobs.values() if j.state == QUEUED]
+            status["position"] = next((i for i, j in enumerate(waiting) if j.id == job_id), 0) + 1
+        return status
+
+    def result(self, job_id: str) -> dict | None:
+        """Final sections of a finished job, or None while it is still queued or running."""
+        job = self._jobs.get(job_id)
+        return job.results if job is not None and job.state == DONE else None
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.state == QUEUED:
+            job.state, job.finished_at = CANCELLED, time.time()
+            self._finish(job)
+        elif job.task is not None:
+            self._loop.call_soon_threadsafe(job.task.cancel)
+        return True
+
+    def metrics(self) -> dict:
+        with self._lock:
+            running = sum(j.state == RUNNING for j in self._jobs.values())
+            return {"queued": self._queued, "running": running, "workers": self.workers,
+                    "max_queue": self.max_queue, **self.stats}
+
+    def close(self) -> None:
+        """Cancel running jobs and stop the workers and the event loop thread."""
+        async def shutdown():
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            await self.workflow.aclose()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -1,15 +1,21 @@
 import asyncio
+import importlib
 import nest_asyncio
 from typing import Any, Annotated
 
-from langgraph.graph import StateGraph, START
 from pydantic import BaseModel, Field
 
-# Import your agents
-from ai_agents.PortfolioAgent import PortfolioAgent
-from ai_agents.ResearchAgent import ResearchAgent
-from ai_agents.RiskAgent import RiskAgent
-from ai_agents.RecommendationAgent import RecommendationAgent
+from utils.agent_runner import llm_cache_scope, token_sink
+from utils.instrumentation import get_tracer
+from utils.model_setup import GEMINI_MODEL_NAME, setting
+from utils.reports import PortfolioReport, Recommendation, ResearchReport, RiskReport, compact
+
+# Bump whenever an agent prompt changes so cached results from older prompts are not reused
+PROMPT_VERSION = "5"
+
+# Portfolio research fan-out: the largest holdings are researched individually, the rest by sector
+RESEARCH_TOP_HOLDINGS = setting("RESEARCH_TOP_HOLDINGS", 8, int)
+RESEARCH_FANOUT = setting("RESEARCH_FANOUT", 4, int)
 
 # Apply nest_asyncio for environments like Jupyter/Colab
 nest_asyncio.apply()
@@ -23,85 +29,459 @@ def keep_first_value(current_value, new_value):
 # === Portfolio State ===
 class PortfolioState(BaseModel):
     portfolio_data: Annotated[Any, keep_first_value] = Field(..., frozen=True)
-    portfolio_summary: str | None = None
-    risk_assessment: str | None = None
-    portfolio_research: str | None = None
-    risk_research: str | None = None
-    recommendation: str | None = None
+    portfolio_metrics: dict | None = None
+    risk_metrics: dict | None = None
+    portfolio_summary: PortfolioReport | None = None
+    risk_assessment: RiskReport | None = None
+    portfolio_research: ResearchReport | None = None
+    risk_research: ResearchReport | None = None
+    recommendation: Recommendation | None = None
+    context_sizes: dict | None = None
+
+
+# === Node outputs and report sections ===
+NODE_OUTPUTS = {
+    "portfolio_metrics": "portfolio_metrics",
+    "risk_metrics": "risk_metrics",
+    "portfolio_agent": "portfolio_summary",
+    "risk_agent": "risk_assessment",
+    "portfolio_research_agent": "portfolio_research",
+    "risk_research_agent": "risk_research",
+    "recommendation_agent": "recommendation",
+}
+
+SECTIONS = {
+    "portfolio_summary": "Portfolio Analysis",
+    "risk_assessment": "Portfolio Risk",
+    "portfolio_research": "Portfolio Research",
+    "risk_research": "Risk Research",
+    "recommendation": "Recommendation",
+}
+
+REPORT_TYPES = {
+    "portfolio_summary": PortfolioReport,
+    "risk_assessment": RiskReport,
+    "portfolio_research": ResearchReport,
+    "risk_research": ResearchReport,
+    "recommendation": Recommendation,
+}
+
+
+def render_section(key: str, value) -> str | None:
+    """Markdown for a report field; reused checkpoints hold the report as a plain dict."""
+    if value is None:
+        return None
+    return REPORT_TYPES[key].model_validate(value).markdown()
+
+
+# Graph edges, also used to work out each node's predecessors for queue-time tracing.
+# A tuple of sources is a join: the target runs once, after all of them have finished.
+EDGES = [
+    ("__start__", "portfolio_metrics"),
+    ("portfolio_metrics", "portfolio_agent"),
+    ("portfolio_metrics", "risk_metrics"),
+    (("portfolio_agent", "risk_metrics"), "risk_agent"),
+    ("portfolio_agent", "portfolio_research_agent"),
+    ("risk_agent", "risk_research_agent"),
+    (("portfolio_research_agent", "risk_research_agent"), "recommendation_agent"),
+]
+
+
+def _holding_subject(holding: dict) -> str:
+    """Resolved holdings are keyed by ticker so name variants ("Apple", "Apple Inc.") share research."""
+    subject = holding.get("ticker") or holding["asset"]
+    return f"{subject} ({holding['sector']})" if holding["sector"] != "Unclassified" else subject
+
+
+def research_units(metrics: dict, top_holdings: int = RESEARCH_TOP_HOLDINGS) -> list[tuple[str, str]]:
+    """Split research into (kind, subject) units: top holdings by allocation, then the remaining sectors."""
+    holdings = metrics["holdings"]  # already sorted by allocation, largest first
+    units = [("holding", _holding_subject(h)) for h in holdings[:top_holdings]]
+    sectors = dict.fromkeys(h["sector"] for h in holdings[top_holdings:] if h["sector"] != "Unclassified")
+    units += [("sector", sector) for sector in sectors]
+    return units
+
+
+def node_inputs(name: str, state: PortfolioState):
+    """The part of the state a node reads; a checkpointed node is reused while this is unchanged."""
+    if name == "portfolio_metrics":
+        return state.portfolio_data
+    if name == "portfolio_agent":
+        return state.portfolio_metrics or state.portfolio_data
+    if name == "portfolio_research_agent":
+        # Only the research units matter: value changes that keep the same top holdings reuse the research
+        return research_units(state.portfolio_metrics) if state.portfolio_metrics else state.portfolio_summary
+    if name == "risk_metrics":
+        from utils.risk_engine import get_risk_engine
+        engine = get_risk_engine()
+        holdings = state.portfolio_metrics["holdings"] if state.portfolio_metrics else None
+        return [holdings, engine.version if engine else None]
+    if name == "risk_agent":
+        return [state.portfolio_summary, state.risk_metrics]
+    if name == "risk_research_agent":
+        return state.risk_assessment
+    return [state.portfolio_summary, state.risk_assessment, state.portfolio_research, state.risk_research]
+
+
+# === Agent Registry ===
+class AgentRegistry:
+    """
+    Builds each agent once, on first use, and reuses it across runs.
+    All agents share one GoogleSearchTool (and therefore one HTTP pool and cache).
+    Agent modules are imported lazily so importing the manager stays cheap.
+    """
+
+    AGENTS = {
+        "portfolio": ("ai_agents.PortfolioAgent", "PortfolioAgent"),
+        "risk": ("ai_agents.RiskAgent", "RiskAgent"),
+        "research": ("ai_agents.ResearchAgent", "ResearchAgent"),
+        "recommendation": ("ai_agents.RecommendationAgent", "RecommendationAgent"),
+    }
+
+    def __init__(self, search_tool=None):
+        self._agents = {}
+        self._search_tool = search_tool
+        self._tools = None
+
+    @property
+    def search_tool(self):
+        if self._search_tool is None:
+            from utils.search_tool import GoogleSearchTool
+            self._search_tool = GoogleSearchTool()
+        return self._search_tool
+
+    @property
+    def tools(self) -> list:
+        if self._tools is None:
+            self._tools = [self.search_tool.as_tool()]
+        return self._tools
+
+    def get(self, name: str):
+        agent = self._agents.get(name)
+        if agent is None:
+            module_name, class_name = self.AGENTS[name]
+            agent_cls = getattr(importlib.import_module(module_name), class_name)
+            agent = self._agents[name] = agent_cls(search_tool=self.search_tool, tools=self.tools)
+        return agent
+
+    def warm(self) -> None:
+        """Build every agent up front (e.g. before the first request)."""
+        for name in self.AGENTS:
+            self.get(name)
+
+    async def aclose(self) -> None:
+        """Close the search tool's HTTP client for the running loop, if one was opened."""
+        if self._search_tool is not None:
+            await self._search_tool.aclose()
 
 
 # === Main Workflow Class ===
 class PortfolioWorkflow:
-    def __init__(self):
-        self.workflow = self._build_workflow()
+    """
+    With `use_cache` on, identical portfolios are served from the result cache and every
+    node is checkpointed per portfolio_id, so reruns only execute nodes whose inputs changed.
+    """
+
+    def __init__(self, use_cache: bool = True, token_budgets: dict | None = None, policies: dict | None = None):
+        from utils.token_budget import TokenBudget
+        from utils.execution_policy import load_policies
+
+        self.agents = AgentRegistry()
+        self.use_cache = use_cache
+        self.token_budget = TokenBudget(token_budgets)
+        self.policies = load_policies(policies)
+        self._workflow = None
+
+    @property
+    def workflow(self):
+        # Compile the graph on first use so constructing the workflow is cheap
+        if self._workflow is None:
+            self._workflow = self._build_workflow()
+        return self._workflow
 
     # --- Node Functions ---
+    async def run_portfolio_metrics(self, state: PortfolioState) -> dict:
+        from utils.portfolio_metrics import analyze_portfolio_metrics
+        metrics = analyze_portfolio_metrics(state.portfolio_data)
+        return {"portfolio_metrics": metrics}
+
     async def run_portfolio_agent(self, state: PortfolioState) -> dict:
-        agent = PortfolioAgent()
-        summary = await agent.analyze_portfolio_async(state.portfolio_data)
+        from utils.portfolio_metrics import format_metrics
+        agent = self.agents.get("portfolio")
+        metrics = format_metrics(state.portfolio_metrics) if state.portfolio_metrics else None
+        summary = await agent.analyze_portfolio_async(state.portfolio_data, metrics=metrics)
         return {"portfolio_summary": summary}
 
+    async def run_risk_metrics(self, state: PortfolioState) -> dict:
+        from utils.risk_engine import get_risk_engine
+        engine = get_risk_engine()
+        return {"risk_metrics": engine.analyze(state.portfolio_metrics) if engine else None}
+
     async def run_risk_agent(self, state: PortfolioState) -> dict:
-        agent = RiskAgent()
-        risks = await agent.analyze_risks_async(state.portfolio_summary)
+        from utils.risk_engine import format_risk
+        agent = self.agents.get("risk")
+        risk_metrics = format_risk(state.risk_metrics) if state.risk_metrics else None
+        risks = await agent.analyze_risks_async(compact(state.portfolio_summary), risk_metrics=risk_metrics)
         return {"risk_assessment": risks}
 
     async def run_portfolio_research_agent(self, state: PortfolioState) -> dict:
-        agent = ResearchAgent()
-        research = await agent.research_async(state.portfolio_summary)
-        return {"portfolio_research": research}
+        agent = self.agents.get("research")
+        if not state.portfolio_metrics:
+            research = await agent.research_async(compact(state.portfolio_summary))
+            return {"portfolio_research": research}
+
+        from utils.reports import Research, parse_report
+        from utils.result_cache import get_research_cache, research_key
+
+        units = research_units(state.portfolio_metrics)
+        # A workflow with use_cache off (e.g. the benchmark) researches every unit afresh
+        cache = get_research_cache() if self.use_cache else None
+        semaphore = asyncio.Semaphore(RESEARCH_FANOUT)
+        sink = token_sink.get()
+
+        async def research_one(kind: str, subject: str) -> Research | None:
+            # Sub-reports run concurrently, so stream each one whole as it completes instead of token by token
+            token_sink.set(None)
+
+            async def compute():
+                async with semaphore:
+                    return (await agent.research_subject_async(kind, subject)).model_dump()
+
+            try:
+                if cache is None:
+                    report = parse_report(Research, await compute())
+                else:
+                    key = research_key(kind, subject, GEMINI_MODEL_NAME, PROMPT_VERSION)
+                    report = parse_report(Research, await cache.aget_or_set(key, compute))
+            except TimeoutError:
+                # A unit that misses the node deadline is left out rather than failing the whole report
+                return None
+            report = report.model_copy(update={"subject": subject})
+            if sink is not None:
+                sink(report.markdown() + "\n\n")
+            return report
+
+        reports = await asyncio.gather(*(research_one(kind, subject) for kind, subject in units))
+        return {"portfolio_research": ResearchReport(
+            items=[report for report in reports if report],
+            missing=[subject for (_, subject), report in zip(units, reports) if report is None],
+        )}
 
     async def run_risk_research_agent(self, state: PortfolioState) -> dict:
-        agent = ResearchAgent()
-        research = await agent.research_async(state.risk_assessment)
+        agent = self.agents.get("research")
+        research = await agent.research_async(compact(state.risk_assessment))
         return {"risk_research": research}
 
     async def run_recommendation_agent(self, state: PortfolioState) -> dict:
-        agent = RecommendationAgent()
+        agent = self.agents.get("recommendation")
+        # Upstream reports go in compact form; the budget only trims what is still over it
+        context, sizes = self.token_budget.apply({
+            "portfolio_summary": compact(state.portfolio_summary),
+            "risk_assessment": compact(state.risk_assessment),
+            "portfolio_research": compact(state.portfolio_research),
+            "risk_research": compact(state.risk_research),
+        })
         recommendation = await agent.analyze_recommendation_async(
-            portfolio_summary=state.portfolio_summary,
-            portfolio_research=state.portfolio_research,
-            risk_assessment=state.risk_assessment,
-            risks_research=state.risk_research,
+            portfolio_summary=context["portfolio_summary"],
+            portfolio_research=context["portfolio_research"],
+            risk_assessment=context["risk_assessment"],
+            risks_research=context["risk_research"],
         )
-        return {"recommendation": recommendation}
+        return {"recommendation": recommendation, "context_sizes": sizes}
 
     # --- Workflow Builder ---
+    def _node(self, name: str, fn):
+        """Wrap a node with tracing, its execution policy and, for streamed runs, start and token events."""
+        from utils.execution_policy import policy_scope
+
+        predecessors = tuple(
+            p for src, dst in EDGES if dst == name
+            for p in (src if isinstance(src, tuple) else (src,))
+        )
+        policy = self.policies.get(name, self.policies["*"])
+
+        async def node(state: PortfolioState, config):
+            configurable = config.get("configurable", {})
+            portfolio_id = configurable.get("portfolio_id")
+            with get_tracer().span("node", name, predecessors=predecessors) as span, policy_scope(name, policy):
+                if portfolio_id is not None:
+                    from utils.checkpoint import get_checkpoint_store, input_hash
+                    inputs = input_hash(node_inputs(name, state), GEMINI_MODEL_NAME, PROMPT_VERSION, self.token_budget.budgets)
+                    saved = get_checkpoint_store().load(portfolio_id, name, inputs)
+                    if span is not None:
+                        span.cache_hit = saved is not None
+                    if saved is not None:
+                        if configurable.get("stream_tokens"):
+                            from langgraph.config import get_stream_writer
+                            get_stream_writer()({"type": "node_start", "node": name, "section": SECTIONS.get(NODE_OUTPUTS[name]), "reused": True})
+                        return saved
+
+                output = await self._execute(name, fn, state, configurable.get("stream_tokens"))
+                # A partial report (e.g. research units that timed out) is retried next run, not reused
+                if portfolio_id is not None and all(getattr(v, "complete", True) for v in (output or {}).values()):
+                    get_checkpoint_store().save(portfolio_id, name, inputs, output)
+                return output
+
+        return node
+
+    @staticmethod
+    async def _execute(name: str, fn, state: PortfolioState, stream_tokens: bool) -> dict:
+        if not stream_tokens:
+            return await fn(state)
+
+        from langgraph.config import get_stream_writer
+        writer = get_stream_writer()
+        section = SECTIONS.get(NODE_OUTPUTS[name])
+        writer({"type": "node_start", "node": name, "section": section})
+        sink = token_sink.set(lambda text: writer({"type": "token", "node": name, "section": section, "text": text}))
+        try:
+            return await fn(state)
+        finally:
+            token_sink.reset(sink)
+
     def _build_workflow(self):
+        from langgraph.graph import StateGraph, START
+
         workflow = StateGraph(PortfolioState)
 
-        workflow.add_node("portfolio_agent", self.run_portfolio_agent)
-        workflow.add_node("risk_agent", self.run_risk_agent)
-        workflow.add_node("portfolio_research_agent", self.run_portfolio_research_agent)
-        workflow.add_node("risk_research_agent", self.run_risk_research_agent)
-        workflow.add_node("recommendation_agent", self.run_recommendation_agent)
+        workflow.add_node("portfolio_metrics", self._node("portfolio_metrics", self.run_portfolio_metrics))
+        workflow.add_node("risk_metrics", self._node("risk_metrics", self.run_risk_metrics))
+        workflow.add_node("portfolio_agent", self._node("portfolio_agent", self.run_portfolio_agent))
+        workflow.add_node("risk_agent", self._node("risk_agent", self.run_risk_agent))
+        workflow.add_node("portfolio_research_agent", self._node("portfolio_research_agent", self.run_portfolio_research_agent))
+        workflow.add_node("risk_research_agent", self._node("risk_research_agent", self.run_risk_research_agent))
+        workflow.add_node("recommendation_agent", self._node("recommendation_agent", self.run_recommendation_agent))
 
-        workflow.add_edge(START, "portfolio_agent")
-        workflow.add_edge("portfolio_agent", "risk_agent")
-        workflow.add_edge("portfolio_agent", "portfolio_research_agent")
-        workflow.add_edge("risk_agent", "risk_research_agent")
-        workflow.add_edge("portfolio_research_agent", "recommendation_agent")
-        workflow.add_edge("risk_research_agent", "recommendation_agent")
+        for src, dst in EDGES:
+            workflow.add_edge(list(src) if isinstance(src, tuple) else START if src == "__start__" else src, dst)
 
         return workflow.compile()
 
     # --- Runner ---
-    async def run(self, portfolio_data: str):
+    @staticmethod
+    def _results(final_state: dict) -> dict:
+        return {section: render_section(key, final_state.get(key)) for key, section in SECTIONS.items()}
+
+    # --- Result cache ---
+    def get_cached(self, portfolio_data: str) -> dict | None:
+        """Results of an earlier identical run (same holdings, model and prompts), if any."""
+        if not self.use_cache:
+            return None
+        from utils.result_cache import get_result_cache, result_key
+        return get_result_cache().get(result_key(portfolio_data, GEMINI_MODEL_NAME, PROMPT_VERSION))
+
+    def _store_cached(self, portfolio_data: str, results: dict, final_state: dict) -> None:
+        # Only complete runs are cached so a failed section or partial report is retried next time
+        if not self.use_cache or not all(results.values()):
+            return
+        if not all(getattr(value, "complete", True) for value in final_state.values()):
+            return
+        from utils.result_cache import get_result_cache, result_key
+        get_result_cache().set(result_key(portfolio_data, GEMINI_MODEL_NAME, PROMPT_VERSION), results)
+
+    # --- Checkpoints ---
+    def _portfolio_id(self, portfolio_data: str, portfolio_id: str | None) -> str | None:
+        """Checkpoints are kept per portfolio; without an explicit id the holdings themselves identify it."""
+        if not self.use_cache:
+            return None
+        if portfolio_id is not None:
+            return portfolio_id
+        from utils.result_cache import normalize_portfolio
+        from utils.checkpoint import input_hash
+        return input_hash(normalize_portfolio(portfolio_data))
+
+    def diff(self, portfolio_data: str, portfolio_id: str) -> dict | None:
+        """Holdings added, removed or changed since the last checkpointed run of `portfolio_id`."""
+        from utils.checkpoint import get_checkpoint_store
+        from utils.portfolio_metrics import analyze_portfolio_metrics, diff_holdings
+
+        previous = get_checkpoint_store().load(portfolio_id, "portfolio_metrics")
+        current = analyze_portfolio_metrics(portfolio_data)
+        if not previous or not previous.get("portfolio_metrics") or current is None:
+            return None
+        return diff_holdings(previous["portfolio_metrics"], current)
+
+    def _config(self, portfolio_data: str, portfolio_id: str | None, **configurable) -> dict:
+        configurable["portfolio_id"] = self._portfolio_id(portfolio_data, portfolio_id)
+        return {"configurable": configurable}
+
+    async def run(self, portfolio_data: str, portfolio_id: str | None = None):
+        cached = await asyncio.to_thread(self.get_cached, portfolio_data)
+        if cached is not None:
+            return cached
+
         initial_state = PortfolioState(portfolio_data=portfolio_data)
-        final_state = await self.workflow.ainvoke(initial_state)
-
-        results = {
-            "Portfolio Analysis": final_state.get("portfolio_summary"),
-            "Portfolio Risk": final_state.get("risk_assessment"),
-            "Portfolio Research": final_state.get("portfolio_research"),
-            "Risk Research": final_state.get("risk_research"),
-            "Recommendation": final_state.get("recommendation"),
-        }
+        with get_tracer().run(), llm_cache_scope(self.use_cache):
+            final_state = await self.workflow.ainvoke(initial_state, config=self._config(portfolio_data, portfolio_id))
+        results = self._results(final_state)
+        await asyncio.to_thread(self._store_cached, portfolio_data, results, final_state)
         return results
 
+    async def stream(self, portfolio_data: str, portfolio_id: str | None = None):
+        """
+        Run the workflow, yielding events as they happen:
+        node_start / token / node_end per node, then a final `done` event with all sections.
+        A cached result is replayed as node_end events without running any node, and
+        checkpointed nodes emit a node_start with `reused` set instead of tokens.
+        """
+        cached = await asyncio.to_thread(self.get_cached, portfolio_data)
+        if cached is not None:
+            for node, key in NODE_OUTPUTS.items():
+                if key in SECTIONS:
+                    yield {"type": "node_end", "node": node, "section": SECTIONS[key], "output": cached[SECTIONS[key]]}
+            yield {"type": "done", "results": cached}
+            return
+
+        initial_state = PortfolioState(portfolio_data=portfolio_data)
+        final_state = {}
+        with get_tracer().run(), llm_cache_scope(self.use_cache):
+            async for mode, chunk in self.workflow.astream(
+                initial_state,
+                config=self._config(portfolio_data, portfolio_id, stream_tokens=True),
+                stream_mode=["custom", "updates"],
+            ):
+                if mode == "custom":
+                    yield chunk
+                    continue
+                for node, update in chunk.items():
+                    key = NODE_OUTPUTS.get(node)
+                    update = update or {}
+                    final_state.update(update)
+                    output = render_section(key, update.get(key)) if key in REPORT_TYPES else update.get(key)
+                    yield {"type": "node_end", "node": node, "section": SECTIONS.get(key), "output": output}
+        results = self._results(final_state)
+        await asyncio.to_thread(self._store_cached, portfolio_data, results, final_state)
+        yield {"type": "done", "results": results}
+
+    async def aclose(self) -> None:
+        """Release the HTTP client bound to the running loop; call before a loop you own ends."""
+        await self.agents.aclose()
+
+    def _run_closing(self, coro):
+        """asyncio.run `coro` in a fresh loop, closing what it opened on that loop before it ends."""
+        async def main():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+
+        return asyncio.run(main())
+
     # ✅ Sync wrapper for Streamlit or normal Python
-    def run_sync(self, portfolio_data: str):
-        return asyncio.run(self.run(portfolio_data))
+    def run_sync(self, portfolio_data: str, portfolio_id: str | None = None):
+        return self._run_closing(self.run(portfolio_data, portfolio_id))
+
+    def stream_sync(self, portfolio_data: str, on_event, portfolio_id: str | None = None):
+        """Drive `stream` to completion, calling `on_event` for each event; returns the final sections."""
+        async def consume():
+            results = None
+            async for event in self.stream(portfolio_data, portfolio_id):
+                on_event(event)
+                if event["type"] == "done":
+                    results = event["results"]
+            return results
+
+        return self._run_closing(consume())
 
 
 # === CLI Entry Point ===
@@ -118,10 +498,42 @@ async def main():
         lines.append(line)
     portfolio_data = "\n".join(lines)
 
-    results = await workflow.run(portfolio_data)
+    try:
+        await print_stream(workflow, portfolio_data)
+    finally:
+        await workflow.aclose()
+
+    # Opt-in profiling: PORTFOLIAI_TRACE=traces.jsonl python manager.py
+    tracer = get_tracer()
+    if tracer.enabled:
+        from utils.rate_limiter import limiter_metrics
+        print(f"\n=== Performance Trace ({tracer.path}) ===\n{tracer.format_summary()}")
+        for metrics in limiter_metrics():
+            print(", ".join(f"{k}: {v}" for k, v in metrics.items()))
+
 
-    for k, v in results.items():
-        print(f"\n=== {k} ===\n{v}")
+async def print_stream(workflow: PortfolioWorkflow, portfolio_data: str) -> None:
+    """Print one section live at a time; sections running in parallel are printed when they finish."""
+    live_node, printed = None, ""
+    async for event in workflow.stream(portfolio_data):
+        node, section = event.get("node"), event.get("section")
+        if section is None:
+            continue
+        if event["type"] == "token":
+            if live_node is None:
+                live_node, printed = node, ""
+                print(f"\n=== {section} ===")
+            if node == live_node:
+                printed += event["text"]
+                print(event["text"], end="", flush=True)
+        elif event["type"] == "node_end":
+            output = event["output"] or ""
+            if node == live_node:
+                # Parts of a structured report that could not be streamed arrive with the final output
+                print(output[len(printed):] if output.startswith(printed) else f"\n\n{output}")
+                live_node = None
+            else:
+                print(f"\n=== {section} ===\n{output}")
 
 
 if __name__ == "__main__":
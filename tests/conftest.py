@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from benchmarks.run_benchmarks import configure_env
+from benchmarks.stub_servers import StubLLMServer, StubSearchServer
+
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    """
+    Stub Gemini and search servers with the app pointed at them, and every shared cache,
+    checkpoint store and rate limiter moved into `tmp_path` for the duration of the test.
+    """
+    import utils.cache
+    import utils.checkpoint
+    import utils.llm_cache
+    import utils.rate_limiter
+    import utils.result_cache
+    import utils.search_tool
+    from agents import set_tracing_disabled
+    from utils.model_setup import get_gemini_client, get_model
+
+    llm = StubLLMServer(latency=0, response_words=40).start()
+    search = StubSearchServer(latency=0).start()
+    environ = dict(os.environ)
+    configure_env(llm, search, str(tmp_path))
+    set_tracing_disabled(True)
+    for module in (utils.cache, utils.checkpoint, utils.rate_limiter):
+        monkeypatch.setattr(module, "DEFAULT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils.checkpoint, "_checkpoint_store", None)
+    monkeypatch.setattr(utils.llm_cache, "_llm_cache", None)
+    monkeypatch.setattr(utils.rate_limiter, "_limiters", {})
+    monkeypatch.setattr(utils.result_cache, "_result_cache", None)
+    monkeypatch.setattr(utils.result_cache, "_research_cache", None)
+    monkeypatch.setattr(utils.search_tool, "_search_cache", None)
+    get_gemini_client.cache_clear()
+    get_model.cache_clear()
+    try:
+        yield llm, search
+    finally:
+        get_gemini_client.cache_clear()
+        get_model.cache_clear()
+        os.environ.clear()
+        os.environ.update(environ)
+        llm.stop()
+        search.stop()
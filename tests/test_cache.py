@@ -0,0 +1,47 @@
+import asyncio
+
+from utils.cache import TTLCache
+
+
+def test_disk_hits_update_access_times_in_batches(tmp_path):
+    cache = TTLCache("touch", cache_dir=str(tmp_path), max_memory_entries=1)
+    cache.set("a", 1)
+    cache.set("b", 2)  # pushes "a" out of memory
+
+    assert cache.get("a") == 1
+    assert cache.stats["disk_hits"] == 1
+    assert "a" in cache._touched
+    cache.set("c", 3)
+    assert not cache._touched
+
+
+def test_trim_keeps_recently_read_entries(tmp_path):
+    cache = TTLCache("trim", cache_dir=str(tmp_path), max_memory_entries=1, max_disk_bytes=250)
+    cache.set("old", "x" * 100)
+    cache.set("new", "y" * 100)
+    cache.get("old")  # a disk hit: "new" is now the least recently used
+
+    cache.set("third", "z" * 100)
+
+    reopened = TTLCache("trim", cache_dir=str(tmp_path))
+    assert reopened.get("old") is not None
+    assert reopened.get("new") is None
+    assert cache._disk_bytes <= 250
+
+
+def test_async_lookups(tmp_path):
+    cache = TTLCache("async", cache_dir=str(tmp_path), max_memory_entries=1)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"v": 1}
+
+    async def run():
+        first = await cache.aget_or_set("k", compute)
+        cache.set("other", 0)  # evicts "k" from memory so the next read goes to disk
+        return first, await cache.aget_or_set("k", compute), await cache.aget("missing", "default")
+
+    assert asyncio.run(run()) == ({"v": 1}, {"v": 1}, "default")
+    assert len(calls) == 1
+    assert cache.stats["disk_hits"] == 1
@@ -0,0 +1,59 @@
+import time
+
+from utils.checkpoint import CHECKPOINT_TTL, CheckpointStore
+from utils.result_cache import RESEARCH_CACHE_TTL, RESULT_CACHE_TTL
+
+
+def test_checkpoints_expire_with_the_research_and_result_caches():
+    assert CHECKPOINT_TTL <= min(RESULT_CACHE_TTL, RESEARCH_CACHE_TTL)
+
+
+def test_stale_checkpoint_is_not_reused(tmp_path):
+    store = CheckpointStore(ttl=60, cache_dir=str(tmp_path))
+    store.save("p", "risk_agent", "h", {"risk_assessment": "x"})
+    store._db.execute("UPDATE checkpoints SET updated_at = ?", (time.time() - 61,))
+
+    assert store.load("p", "risk_agent", "h") is None
+
+
+def test_load_requires_matching_inputs_and_survives_reopen(tmp_path):
+    store = CheckpointStore(cache_dir=str(tmp_path))
+    store.save("p", "risk_agent", "h1", {"risk_assessment": "x"})
+
+    assert store.load("p", "risk_agent", "h1") == {"risk_assessment": "x"}
+    assert store.load("p", "risk_agent", "h2") is None
+    assert store.load("q", "risk_agent", "h1") is None
+    assert CheckpointStore(cache_dir=str(tmp_path)).load("p", "risk_agent", "h1") == {"risk_assessment": "x"}
+
+    store.clear("p")
+    assert store.load("p", "risk_agent") is None
+
+
+def _reused(workflow, portfolio: str) -> tuple[set, dict]:
+    events = []
+    results = workflow.stream_sync(portfolio, events.append, portfolio_id="p")
+    return {e["node"] for e in events if e["type"] == "node_start" and e.get("reused")}, results
+
+
+def test_rerun_reuses_checkpoints_and_reruns_invalidated_nodes(stubs):
+    from manager import PortfolioWorkflow
+    from benchmarks.synthetic import make_markdown
+    from utils.checkpoint import get_checkpoint_store
+    from utils.result_cache import get_result_cache
+
+    workflow, portfolio = PortfolioWorkflow(), make_markdown(3)
+    reused, first = _reused(workflow, portfolio)
+    assert not reused and all(first.values())
+
+    # Without the result cache every node is served from its checkpoint
+    get_result_cache().clear()
+    reused, again = _reused(workflow, portfolio)
+    assert reused == {"portfolio_metrics", "portfolio_agent", "risk_metrics", "risk_agent",
+                      "portfolio_research_agent", "risk_research_agent", "recommendation_agent"}
+    assert again == first
+
+    # A node whose saved inputs no longer match runs again; its unchanged output keeps later nodes reused
+    get_result_cache().clear()
+    get_checkpoint_store()._db.execute("UPDATE checkpoints SET input_hash = 'stale' WHERE node = 'risk_agent'")
+    reused, _ = _reused(workflow, portfolio)
+    assert "risk_agent" not in reused and "recommendation_agent" in reused
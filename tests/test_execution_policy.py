@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.execution_policy as execution_policy
+from utils.execution_policy import ExecutionPolicy, LatencyHistory, execute, load_policies, policy_scope
+
+FAST = dict(backoff_base=0.0, backoff_max=0.0)
+
+
+def _agent(name="Risk Agent"):
+    return SimpleNamespace(name=name, model="gemini-2.5-flash")
+
+
+def _run(policy: ExecutionPolicy, call, agent=None, sink=None):
+    stats = {}
+
+    async def main():
+        with policy_scope("risk_agent", policy):
+            return await execute(call, agent or _agent(), sink, stats)
+
+    return asyncio.run(main()), stats
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    async def call(agent, sink):
+        attempts.append(agent)
+        if len(attempts) < 3:
+            raise TimeoutError("slow")
+        return "ok"
+
+    result, stats = _run(ExecutionPolicy(max_retries=2, **FAST), call)
+    assert result == "ok"
+    assert (stats["attempts"], stats["retries"], stats["timeouts"]) == (3, 2, 2)
+
+
+def test_other_errors_and_streamed_output_are_not_retried():
+    async def broken(agent, sink):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        _run(ExecutionPolicy(max_retries=2, **FAST), broken)
+
+    async def streamed_then_failed(agent, sink):
+        sink("partial")
+        raise TimeoutError("slow")
+
+    received = []
+    with pytest.raises(TimeoutError):
+        _run(ExecutionPolicy(max_retries=2, **FAST), streamed_then_failed, sink=received.append)
+    assert received == ["partial"]  # one attempt only: the text cannot be taken back
+
+
+def test_node_deadline_covers_every_attempt():
+    async def hang(agent, sink):
+        await asyncio.sleep(10)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with policy_scope("risk_agent", ExecutionPolicy(deadline=0.3, attempt_timeout=0.1, max_retries=10, **FAST)):
+            with pytest.raises(TimeoutError):
+                await execute(hang, _agent())
+        return loop.time() - start
+
+    assert asyncio.run(main()) < 0.6
+
+
+def test_hedge_fires_after_the_delay_and_the_first_answer_wins():
+    calls = []
+
+    async def call(agent, sink):
+        calls.append(agent)
+        await asyncio.sleep(0.3 if len(calls) == 1 else 0.01)
+        return f"answer {len(calls)}"
+
+    result, stats = _run(ExecutionPolicy(hedge=True, hedge_delay=0.05), call)
+    assert result == "answer 2"
+    assert (stats["hedged"], stats["hedge_won"]) == (1, 1)
+
+    calls.clear()
+    result, stats = _run(ExecutionPolicy(hedge=False, hedge_delay=0.05), call)
+    assert result == "answer 1" and stats["hedged"] == 0
+
+
+def test_hedge_delay_follows_recent_p95(monkeypatch):
+    history = LatencyHistory()
+    monkeypatch.setattr(execution_policy, "_latencies", history)
+    policy = ExecutionPolicy(hedge=True, hedge_min_delay=0.5, hedge_min_samples=20)
+
+    assert policy.delay_for_hedge("k") is None  # not enough samples yet
+    for i in range(1, 21):
+        history.record("k", float(i))
+    assert policy.delay_for_hedge("k") == 19.0
+    assert ExecutionPolicy(hedge=False).delay_for_hedge("k") is None
+
+
+def test_no_node_hedges_by_default(monkeypatch):
+    for name in ("LLM_HEDGE", "LLM_DEADLINE"):
+        monkeypatch.delenv(name, raising=False)
+    policies = load_policies({"risk_agent": {"deadline": 5}})
+
+    assert not any(policy.hedge for policy in policies.values())
+    assert policies["risk_agent"].deadline == 5
+    monkeypatch.setenv("LLM_HEDGE", "1")
+    assert all(policy.hedge for policy in load_policies().values())
+
+
+def test_fallback_model_is_tried_once_the_primary_is_exhausted(stubs):
+    from agents import Agent
+    from utils.model_setup import get_model
+
+    async def call(agent, sink):
+        if agent.model.model == "primary":
+            raise TimeoutError("primary down")
+        return agent.model.model
+
+    agent = Agent(name="Risk Agent", instructions="Assess risks.", model=get_model("primary"))
+    result, stats = _run(ExecutionPolicy(max_retries=1, fallback_model="fallback", **FAST), call, agent)
+    assert result == "fallback"
+    assert stats["fallback"] is True and stats["attempts"] == 3
+
+
+def test_slow_model_times_out_against_the_stub_server(stubs):
+    from agents import Agent
+    from utils.agent_runner import _run_once
+    from utils.model_setup import get_gemini_model
+
+    llm, _ = stubs
+    llm.latency = 0.5
+    agent = Agent(name="Risk Agent", instructions="Assess risks.", model=get_gemini_model())
+    policy = ExecutionPolicy(deadline=0.7, attempt_timeout=0.2, max_retries=5, **FAST)
+
+    with pytest.raises(TimeoutError):
+        _run(policy, lambda target, sink: _run_once(target, "Assess this portfolio.", sink), agent)
+    assert llm.requests >= 3
+
+    llm.latency = 0
+    result, stats = _run(policy, lambda target, sink: _run_once(target, "Assess this portfolio.", sink), agent)
+    assert result.final_output and stats["attempts"] == 1
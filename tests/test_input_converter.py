@@ -0,0 +1,29 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from benchmarks.synthetic import make_csv
+from utils.cache import TTLCache
+from utils.input_converter import InputConverter
+from utils.serializer import count_tokens, estimate_markdown_tokens
+
+
+def test_stats_are_returned_per_call_when_threads_share_a_converter(tmp_path):
+    converter = InputConverter(cache=TTLCache("converted_inputs", cache_dir=str(tmp_path)), resolve_symbols=False)
+    files = [make_csv(n, seed=n) for n in (5, 50, 500)] * 4
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda data: converter.convert_with_stats(data, file_type="csv"), files))
+
+    for (text, stats), data in zip(results, files):
+        assert stats["output_tokens"] == count_tokens(text)
+        assert stats["markdown_tokens"] > stats["output_tokens"]
+        assert text == converter.convert(data, file_type="csv")
+
+
+def test_markdown_token_estimate_is_close_to_the_rendered_table():
+    df = pd.read_csv(io.BytesIO(make_csv(500)))
+    actual = count_tokens(df.to_markdown(index=False))
+
+    assert abs(estimate_markdown_tokens(df) - actual) / actual < 0.15
@@ -0,0 +1,83 @@
+import time
+import asyncio
+
+import pytest
+
+from job_service import CANCELLED, DONE, QUEUED, RUNNING, JobService, QueueFullError
+
+
+class SlowWorkflow:
+    """Stands in for PortfolioWorkflow: one section that takes `seconds` to finish."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    async def stream(self, portfolio_data, portfolio_id=None):
+        yield {"type": "node_start", "node": "portfolio_agent", "section": "Summary"}
+        yield {"type": "token", "node": "portfolio_agent", "section": "Summary", "text": "partial"}
+        await asyncio.sleep(self.seconds)
+        yield {"type": "node_end", "node": "portfolio_agent", "section": "Summary", "output": portfolio_data}
+        yield {"type": "done", "results": {"Summary": portfolio_data}}
+
+    async def aclose(self):
+        pass
+
+
+def _wait(service, job_id, *states, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while service.status(job_id)["state"] not in states:
+        assert time.monotonic() < deadline, service.status(job_id)
+        time.sleep(0.01)
+    return service.status(job_id)
+
+
+def test_queue_limit_and_duplicate_submits():
+    service = JobService(SlowWorkflow(60), workers=1, max_queue=1)
+    try:
+        running = service.submit("a")
+        status = _wait(service, running, RUNNING)
+        assert status["sections"] == {"Summary": "partial"} and status["active"] == ["Summary"]
+
+        queued = service.submit("b")
+        assert service.status(queued)["state"] == QUEUED and service.status(queued)["position"] == 1
+        assert service.submit("b") == queued  # coalesced, not a second job
+        with pytest.raises(QueueFullError):
+            service.submit("c")
+        assert service.metrics()["rejected"] == 1 and service.metrics()["submitted"] == 2
+    finally:
+        service.close()
+
+
+def test_cancel_queued_and_running_jobs():
+    service = JobService(SlowWorkflow(60), workers=1, max_queue=4)
+    try:
+        running, queued = service.submit("a"), service.submit("b")
+        _wait(service, running, RUNNING)
+
+        assert service.cancel(queued)
+        assert service.status(queued)["state"] == CANCELLED
+        assert service.cancel(running)
+        _wait(service, running, CANCELLED)
+        assert not service.cancel(running)  # already finished
+
+        # The worker survives cancelling its job and picks up new work
+        service.workflow.seconds = 0
+        done = service.submit("d")
+        _wait(service, done, DONE)
+        assert service.result(done) == {"Summary": "d"}
+        assert service.metrics()["cancelled"] == 2 and service.metrics()["completed"] == 1
+    finally:
+        service.close()
+
+
+def test_job_runs_the_workflow_to_completion(stubs):
+    from benchmarks.synthetic import make_markdown
+
+    service = JobService(workers=1)
+    try:
+        job_id = service.submit(make_markdown(3), portfolio_id="p")
+        status = _wait(service, job_id, DONE, timeout=60)
+        assert status["error"] is None and not status["active"]
+        assert all(service.result(job_id).values())
+    finally:
+        service.close()
@@ -0,0 +1,56 @@
+from agents import Agent
+
+from utils.cache import TTLCache
+from utils.llm_cache import LLMResponseCache, normalize_prompt
+
+PROMPT = """Portfolio holdings:
+| Asset | Quantity | Value |
+|---|---|---|
+| Apple | 10 | 1,834.56 |
+| Microsoft | 5 | 2,051.30 |
+Summarize the allocation."""
+
+# Long enough that one changed word leaves most 5-word shingles intact
+REPORT = " ".join(f"Holding {i} is a large cap position in sector {i % 7} with stable weight." for i in range(40))
+
+
+def _agent(name="Risk Agent", instructions="Assess risks."):
+    return Agent(name=name, instructions=instructions, model="gemini-2.5-flash")
+
+
+def test_normalize_prompt_ignores_spacing_row_order_and_numeric_drift():
+    reordered = """Portfolio   holdings:
+| Asset | Quantity | Value |
+| --- | --- | --- |
+| Microsoft | 5 | 2051.31 |
+| Apple |  10 | 1834.57 |
+
+Summarize the allocation."""
+
+    assert normalize_prompt(reordered) == normalize_prompt(PROMPT)
+    assert normalize_prompt(PROMPT.replace("| 10 |", "| 11 |")) != normalize_prompt(PROMPT)
+    assert normalize_prompt("Value 123,456.78", precision=3) == "Value 1.23e+05"
+
+
+def test_exact_hits_are_scoped_to_the_agent(tmp_path):
+    cache = LLMResponseCache(TTLCache("llm", cache_dir=str(tmp_path)))
+    cache.set(_agent(), PROMPT, "answer")
+
+    assert cache.get(_agent(), PROMPT.replace("  ", " ")) == ("answer", "exact")
+    assert cache.get(_agent(instructions="Assess risks briefly."), PROMPT) == (None, None)
+
+
+def test_near_duplicate_lookup(tmp_path):
+    cache = LLMResponseCache(TTLCache("llm", cache_dir=str(tmp_path)), near_dup_threshold=0.8)
+    cache.set(_agent(), REPORT, "answer")
+
+    assert cache.get(_agent(), REPORT.replace("Holding 20 is", "Holding 20 was")) == ("answer", "near")
+    assert cache.get(_agent(), "A completely different prompt about bonds and yields.") == (None, None)
+    assert cache.get(_agent(name="Portfolio Agent"), REPORT.replace("Holding 20 is", "Holding 20 was")) == (None, None)
+
+
+def test_near_duplicates_are_off_by_default(tmp_path):
+    cache = LLMResponseCache(TTLCache("llm", cache_dir=str(tmp_path)))
+    cache.set(_agent(), REPORT, "answer")
+
+    assert cache.get(_agent(), REPORT.replace("Holding 20 is", "Holding 20 was")) == (None, None)
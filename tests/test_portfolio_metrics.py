@@ -0,0 +1,130 @@
+import pytest
+
+from utils.cache import TTLCache
+from utils.input_converter import InputConverter
+from utils.portfolio_metrics import compute_metrics, format_metrics, parse_holdings
+
+# Blank first cell (sector) and blank last cell (ticker)
+CSV = b"""Sector,Asset,Quantity,Current Value,Ticker
+,Apple Inc.,10,2000,AAPL
+Technology,Microsoft,5,2100,MSFT
+Materials,Tata Steel,100,14000,
+"""
+
+
+@pytest.fixture
+def converter(tmp_path):
+    def make(output_format):
+        cache = TTLCache("converted_inputs", cache_dir=str(tmp_path))
+        return InputConverter(cache=cache, output_format=output_format, resolve_symbols=False)
+    return make
+
+
+@pytest.mark.parametrize("output_format", ["compact", "jsonl", "markdown"])
+def test_converted_csv_keeps_rows_with_blank_cells(converter, output_format):
+    text = converter(output_format).convert(CSV, file_type="csv")
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Apple Inc.", "Microsoft", "Tata Steel"]
+    assert list(holdings["ticker"]) == ["AAPL", "MSFT", ""]
+    assert list(holdings["sector"]) == ["Unclassified", "Technology", "Materials"]
+    assert holdings["current_value"].sum() == 18100
+    assert holdings.attrs["skipped_rows"] == 0
+
+
+def test_compact_blank_first_and_last_cells():
+    text = "asset|quantity|current_value|sector\n|10|2000|Technology\nTata Steel|100|14000|"
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Tata Steel"]
+    assert holdings["quantity"].tolist() == [100]
+    assert holdings.iloc[0]["sector"] == "Unclassified"
+    # The row without an asset is reported, not silently dropped
+    assert holdings.attrs["skipped_rows"] == 1
+
+
+def test_markdown_blank_first_and_last_cells():
+    text = (
+        "| Sector | Asset | Quantity | Current Value | Note |\n"
+        "|---|---|---|---|---|\n"
+        "| | Apple | 10 | 2000 | |\n"
+        "| Energy | Exxon | 20 | 2400 | held |\n"
+    )
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Apple", "Exxon"]
+    assert list(holdings["sector"]) == ["Unclassified", "Energy"]
+    assert holdings["current_value"].sum() == 4400
+
+
+def test_jsonl_missing_keys():
+    text = '{"asset":"Apple","quantity":"10","current_value":"2000"}\n{"asset":"Exxon","current_value":"2400","sector":"Energy"}'
+    holdings = parse_holdings(text)
+
+    assert list(holdings["sector"]) == ["Unclassified", "Energy"]
+    assert holdings["current_value"].sum() == 4400
+
+
+def test_short_rows_are_padded_and_long_rows_counted():
+    text = "asset|quantity|current_value|sector\nApple|10|2000\nExxon|20|2400|Energy|extra"
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Apple"]
+    assert holdings.attrs["skipped_rows"] == 1
+
+
+def test_total_rows_are_not_holdings():
+    text = (
+        "| Asset | Quantity | Current Value |\n"
+        "|---|---|---|\n"
+        "| Apple | 10 | 2000 |\n"
+        "| Exxon | 20 | 1950 |\n"
+        "| Sub-total | | 3950 |\n"
+        "| Total | | 3950 |\n"
+    )
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Apple", "Exxon"]
+    assert holdings["current_value"].sum() == 3950
+    assert holdings.attrs["skipped_rows"] == 0
+
+
+def test_blank_asset_falls_back_to_ticker():
+    text = '{"ticker":"MSFT","current_value":"2100"}\n{"asset":"Apple","ticker":"AAPL","current_value":"2000"}'
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["MSFT", "Apple"]
+
+
+def test_currency_prefixes_and_accounting_negatives():
+    text = (
+        "asset|quantity|current_value|cost\n"
+        "TCS|10|Rs. 35,000|INR 30,000\n"
+        "Infosys|5|₹80,000.50|$ 1,000\n"
+        "Loss Co|1|(1,234)|Rs.(2,000)\n"
+    )
+    holdings = parse_holdings(text)
+
+    assert holdings["current_value"].tolist() == [35000, 80000.5, -1234]
+    assert holdings["cost_basis"].tolist() == [30000, 1000, -2000]
+
+
+def test_holdings_named_total_are_kept():
+    text = (
+        "| Asset | Quantity | Current Value |\n"
+        "|---|---|---|\n"
+        "| Total Energies | 10 | 600 |\n"
+        "| Total SE | 5 | 300 |\n"
+        "| Total | | 900 |\n"
+    )
+    holdings = parse_holdings(text)
+
+    assert list(holdings["asset"]) == ["Total Energies", "Total SE"]
+
+
+def test_missing_cost_data_is_not_reported_as_zero():
+    metrics = compute_metrics(parse_holdings("asset|quantity|current_value\nApple|10|2000\nExxon|20|2400"))
+
+    assert metrics["total_cost"] is None and metrics["total_unrealized_pnl"] is None
+    assert "Total cost" not in format_metrics(metrics)
+    assert "Unrealized P&L" not in format_metrics(metrics)
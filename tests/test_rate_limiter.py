@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import BATCH, INTERACTIVE, QuotaExceededError, RateLimiter, priority_scope
+
+
+def test_interactive_callers_go_before_batch(tmp_path):
+    limiter = RateLimiter("gemini", rps=20, burst=1, cache_dir=str(tmp_path))
+    order = []
+
+    async def call(priority):
+        with priority_scope(priority):
+            await limiter.acquire()
+        order.append(priority)
+
+    async def main():
+        await limiter.acquire()  # empty the bucket so every caller below has to wait
+        batch = [asyncio.ensure_future(call(BATCH)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        await asyncio.gather(*batch, *(call(INTERACTIVE) for _ in range(3)))
+
+    asyncio.run(main())
+    assert order == [INTERACTIVE] * 3 + [BATCH] * 3
+    metrics = limiter.metrics()
+    assert metrics["throttled"] == 6 and metrics["wait_p95_s"] > 0
+    assert metrics["waiting_interactive"] == metrics["waiting_batch"] == 0  # waiter rows are removed
+
+
+def test_daily_quota_is_shared_and_enforced(tmp_path):
+    first = RateLimiter("search", daily_quota=3, cache_dir=str(tmp_path))
+    second = RateLimiter("search", daily_quota=3, cache_dir=str(tmp_path))  # e.g. another process
+
+    asyncio.run(first.acquire())
+    second.acquire_sync()
+    asyncio.run(first.acquire())
+    with pytest.raises(QuotaExceededError):
+        second.acquire_sync()
+
+    assert second.metrics()["daily_used"] == 3 and second.metrics()["daily_remaining"] == 0
+    assert second.stats["quota_rejected"] == 1
+
+
+def test_settle_and_penalize(tmp_path):
+    limiter = RateLimiter("gemini", tpm=600, cache_dir=str(tmp_path))
+
+    async def main():
+        await limiter.acquire(100)
+        await limiter.asettle(100, 400)  # used 300 more tokens than reserved
+        await limiter.apenalize(0.3)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.acquire(10)
+        return loop.time() - start
+
+    assert asyncio.run(main()) >= 0.25
+    assert limiter.stats["tokens"] == 410 and limiter.stats["penalties"] == 1
@@ -0,0 +1,37 @@
+from utils.reports import PartialJSON, Recommendation, RiskReport, parse_report
+
+
+def test_unknown_enum_values_fall_back_to_defaults():
+    risks = parse_report(RiskReport, '{"summary": "s", "risks": [{"title": "Rates", "severity": "Critical"}]}')
+    advice = parse_report(Recommendation, '{"suggestions": [{"action": "Trim", "priority": "urgent"}, {"action": "Add", "priority": " HIGH "}]}')
+
+    assert risks.summary == "s" and risks.risks[0].severity == "medium"
+    assert [s.priority for s in advice.suggestions] == ["medium", "high"]
+    assert "{" not in advice.markdown()
+
+
+def test_partial_json_closes_an_object_as_it_streams():
+    stream = PartialJSON()
+    stream.feed('```json\n{"summary": "Tech hea')
+    assert stream.value() == {"summary": "Tech hea"}
+
+    stream.feed('vy", "risks": [{"title": "Rates"}, {"title": "Cur')
+    # an object still open inside a list is left out until it closes
+    assert stream.value() == {"summary": "Tech heavy", "risks": [{"title": "Rates"}]}
+
+    stream.feed('rency"}], "score": 1')
+    assert stream.value()["risks"][-1] == {"title": "Currency"}
+    assert stream.value()["score"] == 1
+
+    stream.feed('2}\n```')
+    assert stream.value() == {"summary": "Tech heavy", "risks": [{"title": "Rates"}, {"title": "Currency"}], "score": 12}
+    assert stream.text.endswith("}")
+
+
+def test_partial_json_drops_dangling_keys_and_escapes():
+    stream = PartialJSON()
+    stream.feed('{"a": "x\\')
+    assert stream.value() == {"a": "x"}
+    stream.feed('"y", "b"')
+    assert stream.value() == {"a": 'x"y'}
+    assert PartialJSON().value() is None
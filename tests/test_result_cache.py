@@ -0,0 +1,38 @@
+from utils.reports import Research, ResearchReport
+from utils.result_cache import normalize_portfolio, research_key, result_key
+
+HEADER = "asset|quantity|current_value|sector\nApple|10|2000|Technology\nMicrosoft|5|2100|Technology\n"
+
+
+def test_blank_last_cell_portfolios_get_distinct_keys():
+    tata = HEADER + "Tata Steel|100|14000|"
+    zomato = HEADER + "Zomato|100000|25000000|"
+
+    assert result_key(tata, "model", "1") != result_key(zomato, "model", "1")
+
+
+def test_row_order_and_spacing_share_a_key():
+    a = "asset|quantity|current_value\nApple|10|2000\nExxon|20|2400"
+    b = "asset|quantity|current_value\nExxon|20|2400.0\nApple | 10 | 2000"
+
+    assert normalize_portfolio(a) == normalize_portfolio(b)
+
+
+def test_unreadable_rows_fall_back_to_raw_text():
+    a = "asset|quantity|current_value\nApple|10|2000\nTata Steel|100|14000|x|y"
+    b = "asset|quantity|current_value\nApple|10|2000\nZomato|100000|25000000|x|y"
+
+    assert normalize_portfolio(a) != normalize_portfolio(b)
+
+
+def test_research_key_includes_model_and_prompt_version():
+    assert research_key("company", "Apple", "model-a", "1") != research_key("company", "Apple", "model-b", "1")
+    assert research_key("company", "Apple", "model-a", "1") != research_key("company", "Apple", "model-a", "2")
+
+
+def test_research_report_with_missing_subjects_is_incomplete():
+    report = ResearchReport(items=[Research(subject="Apple")], missing=["Exxon"])
+
+    assert not report.complete
+    assert "Exxon" in report.markdown()
+    assert "missing" not in report.model_dump()
@@ -0,0 +1,53 @@
+import numpy as np
+
+from utils.risk_engine import MIN_OBSERVATIONS, RiskEngine
+
+
+def _engine() -> RiskEngine:
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, size=(300, 4))
+    returns[:250, 3] = np.nan  # NEWCO only has the last 50 days of history
+    return RiskEngine(returns, ["AAPL", "MSFT", "SPY", "NEWCO"], benchmark="SPY")
+
+
+def _holdings(*tickers: str) -> list[dict]:
+    return [{"ticker": t, "allocation_pct": 100 / len(tickers)} for t in tickers]
+
+
+def test_figures_do_not_depend_on_the_batch():
+    engine = _engine()
+    alone = engine.analyze_many([_holdings("AAPL", "MSFT")])[0]
+    batched = engine.analyze_many([_holdings("AAPL", "MSFT"), _holdings("AAPL", "NEWCO")])[0]
+
+    assert alone == batched
+    assert alone["observations"] >= MIN_OBSERVATIONS
+
+
+def test_tickers_match_case_insensitively():
+    engine = _engine()
+
+    assert engine.analyze_many([_holdings("aapl", " msft")]) == engine.analyze_many([_holdings("AAPL", "MSFT")])
+
+
+def test_portfolio_without_price_history_gets_none():
+    assert _engine().analyze_many([_holdings("UNKNOWN"), _holdings("AAPL")])[0] is None
+
+
+def test_holdings_without_history_are_left_out_not_zero_filled():
+    engine = _engine()
+    engine.returns[:, 3] = np.nan  # NEWCO has no history at all
+    alone = engine.analyze_many([_holdings("AAPL")])[0]
+    mixed = engine.analyze_many([_holdings("AAPL", "NEWCO")])[0]
+
+    assert mixed["coverage_pct"] == 50
+    assert mixed["short_history"] == ["NEWCO"]
+    assert mixed["volatility_pct"] == alone["volatility_pct"]
+    assert [h["ticker"] for h in mixed["holdings"]] == ["AAPL"]
+
+
+def test_flat_series_has_no_correlation_pair():
+    engine = _engine()
+    engine.returns[:, 1] = 0.0  # MSFT never moves
+    result = engine.analyze_many([_holdings("AAPL", "MSFT")])[0]
+
+    assert result["top_correlations"] == []
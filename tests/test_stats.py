@@ -0,0 +1,9 @@
+from utils.stats import percentile
+
+
+def test_percentile_is_nearest_rank_over_unsorted_values():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 95) == 5.0
+    assert percentile(values, 0) == 1.0
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from utils.cache import TTLCache
+from utils.input_converter import InputConverter
+from utils.portfolio_metrics import parse_holdings
+from utils.symbol_index import get_symbol_index
+
+
+def test_enrich_fills_nan_tickers():
+    df = pd.DataFrame({"Asset": ["Apple Inc.", "Unknown Co"], "Ticker": [float("nan"), float("nan")], "Qty": [10, 5]})
+    enriched = get_symbol_index().enrich(df, asset_column="Asset", ticker_column="Ticker")
+
+    assert enriched["Ticker"].tolist()[0] == "AAPL"
+    assert enriched["asset_class"].tolist() == ["Equity", ""]
+    assert list(enriched.columns) == ["Asset", "asset_class", "Ticker", "Qty", "sector"]
+
+
+def test_unresolved_holdings_survive_conversion(tmp_path):
+    csv = b"Asset,Ticker,Quantity,Current Value\nApple Inc.,,10,2000\nUnknown Co,,5,500\n"
+    converter = InputConverter(cache=TTLCache("converted_inputs", cache_dir=str(tmp_path)))
+    holdings = parse_holdings(converter.convert(csv, file_type="csv"))
+
+    assert list(holdings["asset"]) == ["Apple Inc.", "Unknown Co"]
+    assert list(holdings["ticker"]) == ["AAPL", ""]
+
+
+def test_fuzzy_match_needs_every_distinguishing_word():
+    index = get_symbol_index()
+
+    assert index.lookup("Reliance Power") is None
+    assert index.lookup("Vanguard S&P 500") is None
+    assert index.lookup("Coca Cola Consolidated") is None
+    assert index.lookup("Microsft Corp").ticker == "MSFT"
+    assert index.lookup("Reliance Industries Ltd").ticker == "RELIANCE"
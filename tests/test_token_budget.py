@@ -0,0 +1,44 @@
+from utils.serializer import count_tokens
+from utils.token_budget import TokenBudget, compact_text
+
+REPORT = """## Allocation
+Equities make up most of the portfolio and dominate its return profile over time.
+Bonds are a small share, which limits the cushion in a drawdown for this investor.
+Cash is negligible.
+## Risks
+Concentration in two technology names drives most of the volatility this year.
+Currency exposure is unhedged and adds noise to reported returns every quarter.
+Sources:
+https://example.com/report
+"""
+
+
+def test_short_text_is_returned_unchanged():
+    assert compact_text(REPORT, 10_000) is REPORT
+
+
+def test_compact_keeps_headings_references_and_each_section_lead():
+    compacted = compact_text(REPORT, 70)
+    lines = compacted.splitlines()
+
+    assert count_tokens(compacted) <= 70
+    assert "## Allocation" in lines and "## Risks" in lines
+    assert "Sources:" in lines and "https://example.com/report" in lines
+    # breadth-first: the first body line of every section survives before any second line
+    assert lines[1].startswith("Equities") and lines[lines.index("## Risks") + 1].startswith("Concentration")
+    assert not any(line.startswith("Currency") for line in lines)
+    # kept lines stay in their original order
+    original = REPORT.splitlines()
+    assert [original.index(line) for line in lines] == sorted(original.index(line) for line in lines)
+
+
+def test_token_budget_records_sizes_per_section():
+    compacted, sizes = TokenBudget({"portfolio_summary": 70}).apply({"portfolio_summary": REPORT, "risk_research": None})
+
+    assert sizes["portfolio_summary"] == {
+        "tokens": count_tokens(REPORT),
+        "budget": 70,
+        "final_tokens": count_tokens(compacted["portfolio_summary"]),
+    }
+    assert compacted["risk_research"] == ""
+    assert sizes["risk_research"]["tokens"] == 0
@@ -0,0 +1,91 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+from utils.instrumentation import get_tracer
+
+# Set by the workflow while a node is streaming; receives text deltas as the model produces them
+token_sink: ContextVar[Callable[[str], None] | None] = ContextVar("token_sink", default=None)
+
+# Cleared by a workflow created with use_cache=False (e.g. the benchmark) so its runs bypass the LLM response cache
+llm_cache_enabled: ContextVar[bool] = ContextVar("llm_cache_enabled", default=True)
+
+
+@contextmanager
+def llm_cache_scope(enabled: bool):
+    token = llm_cache_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        llm_cache_enabled.reset(token)
+
+
+async def _run_once(agent, input: str, sink):
+    from agents import Runner
+
+    if sink is None:
+        return await Runner.run(agent, input)
+
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    result = Runner.run_streamed(agent, input)
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                sink(event.data.delta)
+    except asyncio.CancelledError:
+        # Lost a hedge race or hit the deadline: stop the background run as well
+        result.cancel()
+        raise
+    return result
+
+
+async def run_agent(agent, input: str, output_type=None):
+    """
+    Run an agent and return its final output.
+    Answers are served from the LLM response cache when an equivalent prompt was seen before.
+    Otherwise the call runs under the current node's execution policy (deadline, retries, hedging, fallback).
+    When a token sink is active the run is streamed and every text delta is forwarded to it.
+    With `output_type` (a utils.reports model) the JSON reply is parsed into that model, and the sink
+    receives its markdown rendering as it grows rather than the raw JSON.
+    """
+    from utils.execution_policy import execute
+    from utils.llm_cache import get_llm_cache
+    from utils.reports import MarkdownStream, parse_report
+
+    with get_tracer().span("llm", agent.name) as span:
+        cache = get_llm_cache() if llm_cache_enabled.get() else None
+        # The LLM cache reads and writes SQLite, so it runs in a worker thread off the event loop
+        output, match = await asyncio.to_thread(cache.get, agent, input) if cache else (None, None)
+        if span is not None:
+            span.cache_hit = match is not None
+            span.attributes["llm_cache"] = match
+        sink = token_sink.get()
+        if match is not None:
+            if output_type is not None:
+                output = parse_report(output_type, output)
+            text = output.markdown() if output_type is not None else output
+            if sink is not None and isinstance(text, str):
+                sink(text)
+            return output
+
+        if sink is not None and output_type is not None:
+            sink = MarkdownStream(output_type, sink)
+
+        stats = span.attributes if span is not None else None
+        result = await execute(lambda target, sink: _run_once(target, input, sink), agent, sink, stats)
+
+        if span is not None:
+            usage = result.context_wrapper.usage
+            span.tokens_in = usage.input_tokens
+            span.tokens_out = usage.output_tokens
+            span.attributes["requests"] = usage.requests
+        if output_type is None:
+            output = result.final_output
+            if cache:
+                await asyncio.to_thread(cache.set, agent, input, output)
+            return output
+        report = parse_report(output_type, result.final_output)
+        if cache:
+            await asyncio.to_thread(cache.set, agent, input, report.model_dump())
+        return report
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from utils.model_setup import setting
+
+DEFAULT_CACHE_DIR = setting("PORTFOLIAI_CACHE_DIR", os.path.join(".cache", "portfoliai"), str)
+
+TOUCH_BATCH = 64  # disk hits whose accessed_at is written in one statement
+
+
+class TTLCache:
+    """
+    Two-tier cache: an in-process LRU in front of an on-disk SQLite store.
+    Values must be JSON-serializable. Entries expire after their TTL and the
+    disk tier is trimmed (least recently used first) once it exceeds max_disk_bytes.
+    Concurrent misses for the same key are coalesced so only one caller computes it.
+
+    Disk hits record their access time in memory; the times are written in batches (and
+    before any trim), so a read does not commit. The disk size is tracked as a running
+    estimate and only summed when that estimate exceeds the limit. Async callers use
+    aget/aset/aget_or_set, which answer memory hits inline and run SQLite in a worker thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float = 24 * 3600,
+        max_memory_entries: int = 1024,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        cache_dir: str | None = None,
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._memory: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._inflight: dict[str, threading.Event] = {}
+        self._touched: dict[str, float] = {}
+        self._async_inflight: dict[str, asyncio.Future] = {}
+
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, f"{name}.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # --- Lookup ---
+    def _memory_get(self, key: str, now: float):
+        """The value from the in-process tier, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+            return None
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        return self._disk_get(key, now, default)
+
+    def _disk_get(self, key: str, now: float, default=None):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._touched[key] = now
+                if len(self._touched) >= TOUCH_BATCH:
+                    self._flush_touched()
+                    self._db.commit()
+                self._remember(key, row[1], value)
+                self.stats["disk_hits"] += 1
+                return value
+            if row is not None:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.stats["misses"] += 1
+            return default
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._touched.pop(key, None)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, expires_at, now, len(payload)),
+            )
+            # Replacements and other processes' writes make this an estimate; _evict_disk recounts
+            self._disk_bytes += len(payload)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+            self._flush_touched()
+            self._db.commit()
+
+    async def aget(self, key: str, default=None):
+        """get() for async callers: a memory hit is answered inline, the disk tier is read in a worker thread."""
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self._disk_get, key, now, default)
+
+    async def aset(self, key: str, value, ttl: float | None = None) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def get_or_set(self, key: str, compute, ttl: float | None = None):
+        """Return the cached value, or compute it once even if several threads miss together."""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                event.wait()
+                continue
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    async def aget_or_set(self, key: str, compute, ttl: float | None = None):
+        """Async counterpart of get_or_set; `compute` is a coroutine function."""
+        loop = asyncio.get_running_loop()
+        while True:
+            value = await self.aget(key)
+            if value is not None:
+                return value
+            future = self._async_inflight.get(key)
+            if future is not None and future.get_loop() is loop:
+                try:
+                    await asyncio.shield(future)
+                except Exception:
+                    pass
+                continue
+            future = self._async_inflight[key] = loop.create_future()
+            try:
+                value = await compute()
+                if value is not None:
+                    await self.aset(key, value, ttl)
+                return value
+            finally:
+                if self._async_inflight.get(key) is future:
+                    del self._async_inflight[key]
+                if not future.done():
+                    future.set_result(None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._disk_bytes = 0
+
+    # --- Internals ---
+    def _remember(self, key: str, expires_at: float, value) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict_disk(self) -> None:
+        now = time.time()
+        self._flush_touched()
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.stats["evictions"] += 1
+        self._disk_bytes = total
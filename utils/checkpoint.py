@@ -0,0 +1,92 @@
+"""
+Durable per-node checkpoints for PortfolioWorkflow.
+
+After each node finishes, its state update is written to SQLite under (portfolio_id, node),
+together with a hash of the inputs the node read. A later run for the same portfolio reuses
+every node whose inputs still hash the same. A failed run therefore resumes after its last
+completed node, and an edited portfolio re-executes only the nodes whose inputs changed.
+Checkpoints are reused for no longer than the result and research caches keep their
+entries, so a rerun never replays research older than the research cache would serve.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pydantic import BaseModel
+from utils.cache import DEFAULT_CACHE_DIR
+from utils.model_setup import setting
+from utils.result_cache import RESEARCH_CACHE_TTL, RESULT_CACHE_TTL
+
+CHECKPOINT_TTL = min(setting("CHECKPOINT_TTL", RESULT_CACHE_TTL), RESULT_CACHE_TTL, RESEARCH_CACHE_TTL)
+
+
+def _jsonable(value):
+    # Typed agent reports are stored and hashed as their fields
+    return value.model_dump(mode="json") if isinstance(value, BaseModel) else str(value)
+
+
+def input_hash(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=_jsonable)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Latest output of every node per portfolio; entries older than the TTL are dropped on open."""
+
+    def __init__(self, name: str = "checkpoints", ttl: float = CHECKPOINT_TTL, cache_dir: str | None = None) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, f"{name}.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "portfolio_id TEXT NOT NULL, node TEXT NOT NULL, input_hash TEXT NOT NULL, "
+            "output TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (portfolio_id, node))"
+        )
+        self._db.execute("DELETE FROM checkpoints WHERE updated_at < ?", (time.time() - ttl,))
+        self._db.commit()
+
+    def load(self, portfolio_id: str, node: str, input_hash: str | None = None) -> dict | None:
+        """The node's saved update, or None if there is none or it was computed from different inputs."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT input_hash, output, updated_at FROM checkpoints WHERE portfolio_id = ? AND node = ?",
+                (portfolio_id, node),
+            ).fetchone()
+        if row is None or row[2] < time.time() - self.ttl:
+            return None
+        if input_hash is not None and row[0] != input_hash:
+            return None
+        return json.loads(row[1])
+
+    def save(self, portfolio_id: str, node: str, input_hash: str, output: dict) -> None:
+        value = json.dumps(output, ensure_ascii=False, default=_jsonable)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (portfolio_id, node, input_hash, output, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (portfolio_id, node, input_hash, value, time.time()),
+            )
+            self._db.commit()
+
+    def clear(self, portfolio_id: str | None = None) -> None:
+        with self._lock:
+            if portfolio_id is None:
+                self._db.execute("DELETE FROM checkpoints")
+            else:
+                self._db.execute("DELETE FROM checkpoints WHERE portfolio_id = ?", (portfolio_id,))
+            self._db.commit()
+
+
+_checkpoint_store = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
@@ -0,0 +1,251 @@
+"""
+Per-node execution policy for LLM calls.
+
+Every agent call made inside a workflow node runs under that node's policy:
+- a node deadline shared by all calls the node makes, plus a per-attempt timeout
+- retries with full-jitter backoff on transient errors (timeouts, connection errors, 429/5xx)
+- an optional hedged second request, fired once the first has run longer than the
+  observed p95 for that agent, whichever answers first wins
+- an optional fallback model, tried once when the primary model is exhausted
+What happened (attempts, retries, timeouts, hedges, fallback) is attached to the LLM span.
+"""
+import os
+import random
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.stats import percentile
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+LATENCY_WINDOW = 200
+
+
+class ExecutionPolicy:
+    def __init__(
+        self,
+        deadline: float = 180.0,
+        attempt_timeout: float = 90.0,
+        max_retries: int = 2,
+        backoff_base: float = 1.0,
+        backoff_max: float = 10.0,
+        hedge: bool = False,
+        hedge_delay: float | None = None,
+        hedge_min_delay: float = 2.0,
+        hedge_min_samples: int = 20,
+        fallback_model: str | None = None,
+    ):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay  # fixed delay; None means p95 of recent latencies
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.fallback_model = fallback_model
+
+    def replace(self, **changes) -> "ExecutionPolicy":
+        return ExecutionPolicy(**{**vars(self), **changes})
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, as in the search tool."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def delay_for_hedge(self, key: str) -> float | None:
+        if not self.hedge:
+            return None
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = _latencies.p95(key, self.hedge_min_samples)
+        return max(self.hedge_min_delay, p95) if p95 is not None else None
+
+
+# Every node's agent calls google_search with tool_choice="required", so a hedge would
+# double the searches; no node hedges by default (LLM_HEDGE or an override turns it on),
+# they rely on retries and the deadline instead.
+DEFAULT_POLICIES = {
+    "portfolio_agent": ExecutionPolicy(deadline=150.0, attempt_timeout=60.0),
+    "risk_agent": ExecutionPolicy(deadline=150.0, attempt_timeout=60.0),
+    "portfolio_research_agent": ExecutionPolicy(deadline=240.0, attempt_timeout=90.0),
+    "risk_research_agent": ExecutionPolicy(deadline=180.0, attempt_timeout=90.0),
+    "recommendation_agent": ExecutionPolicy(deadline=150.0, attempt_timeout=60.0),
+}
+DEFAULT_POLICY = ExecutionPolicy()
+
+
+def _env_overrides() -> dict:
+    """LLM_DEADLINE, LLM_ATTEMPT_TIMEOUT, LLM_MAX_RETRIES, LLM_HEDGE and LLM_FALLBACK_MODEL apply to every node."""
+    from utils.model_setup import load_env
+
+    load_env()
+    settings = {
+        "deadline": ("LLM_DEADLINE", float),
+        "attempt_timeout": ("LLM_ATTEMPT_TIMEOUT", float),
+        "max_retries": ("LLM_MAX_RETRIES", int),
+        "hedge": ("LLM_HEDGE", lambda v: v.lower() in ("1", "true", "yes")),
+        "fallback_model": ("LLM_FALLBACK_MODEL", str),
+    }
+    return {field: cast(os.environ[env]) for field, (env, cast) in settings.items() if os.getenv(env)}
+
+
+def load_policies(overrides: dict | None = None) -> dict[str, ExecutionPolicy]:
+    """
+    Node name -> policy: the defaults, then environment overrides, then `overrides`
+    (either ExecutionPolicy objects or dicts of fields to change).
+    """
+    env = _env_overrides()
+    policies = {name: policy.replace(**env) for name, policy in {"*": DEFAULT_POLICY, **DEFAULT_POLICIES}.items()}
+    for name, override in (overrides or {}).items():
+        base = policies.get(name, policies["*"])
+        policies[name] = override if isinstance(override, ExecutionPolicy) else base.replace(**override)
+    return policies
+
+
+# === Active policy ===
+# (node name, policy, loop time at which the node's deadline expires)
+_active: ContextVar[tuple[str, ExecutionPolicy, float] | None] = ContextVar("execution_policy", default=None)
+
+
+@contextmanager
+def policy_scope(name: str, policy: ExecutionPolicy):
+    """Run a node under `policy`; its deadline starts now and covers every agent call in the node."""
+    token = _active.set((name, policy, asyncio.get_running_loop().time() + policy.deadline))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+class LatencyHistory:
+    """Recent successful call latencies per agent/model, used to place hedges at p95."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, key: str, min_samples: int) -> float | None:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        return percentile(samples, 95)
+
+
+_latencies = LatencyHistory()
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, TimeoutError):
+        return True
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in TRANSIENT_STATUS
+
+
+def _latency_key(agent) -> str:
+    return f"{agent.name}:{getattr(agent.model, 'model', agent.model)}"
+
+
+# === Execution ===
+async def execute(call, agent, sink=None, stats: dict | None = None):
+    """
+    Run `call(agent, sink)` under the active node policy and return its result.
+    Attempts, retries, timeouts, hedges and fallback use are recorded into `stats`.
+    Output that has already been streamed to `sink` cannot be taken back, so a call
+    that fails after streaming is not retried.
+    """
+    name, policy, deadline_at = _active.get() or ("*", DEFAULT_POLICY, None)
+    loop = asyncio.get_running_loop()
+    if deadline_at is None:
+        deadline_at = loop.time() + policy.deadline
+    stats = stats if stats is not None else {}
+    stats.update({"policy": name, "deadline_s": policy.deadline, "attempts": 0, "retries": 0,
+                  "timeouts": 0, "hedged": 0, "hedge_won": 0, "fallback": False, "streamed": False})
+
+    targets = [(agent, policy.max_retries)]
+    if policy.fallback_model:
+        from utils.model_setup import get_model
+        targets.append((agent.clone(model=get_model(policy.fallback_model)), 0))
+
+    error = None
+    for target, retries in targets:
+        stats["fallback"] = target is not agent
+        for attempt in range(retries + 1):
+            budget = min(policy.attempt_timeout, deadline_at - loop.time())
+            if budget <= 0:
+                raise TimeoutError(f"{agent.name}: {name} deadline of {policy.deadline}s exceeded") from error
+            stats["attempts"] += 1
+            stats["retries"] += attempt > 0
+            try:
+                return await asyncio.wait_for(_hedged(call, target, sink, policy, stats), budget)
+            except Exception as e:
+                if not is_transient(e) or stats["streamed"]:
+                    raise
+                error = e
+                stats["timeouts"] += isinstance(e, TimeoutError)
+            if attempt < retries:
+                await asyncio.sleep(min(policy.backoff(attempt), max(0.0, deadline_at - loop.time())))
+    raise error
+
+
+async def _hedged(call, agent, sink, policy: ExecutionPolicy, stats: dict):
+    """
+    Start the call and, if it is still silent after the hedge delay, a second identical one.
+    The first to finish (or, when streaming, the first to produce a token) wins; the other is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    key = _latency_key(agent)
+    tasks, owner = [], []
+
+    def forward(index: int):
+        if sink is None:
+            return None
+
+        def emit(delta: str) -> None:
+            if not owner:
+                owner.append(index)
+                for i, task in enumerate(tasks):
+                    if i != index:
+                        task.cancel()
+            if owner[0] == index:
+                stats["streamed"] = True
+                sink(delta)
+
+        return emit
+
+    async def timed(index: int):
+        start = loop.time()
+        result = await call(agent, forward(index))
+        _latencies.record(key, loop.time() - start)
+        return result
+
+    tasks.append(asyncio.ensure_future(timed(0)))
+    try:
+        delay = policy.delay_for_hedge(key)
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and not owner:
+                stats["hedged"] += 1
+                tasks.append(asyncio.ensure_future(timed(1)))
+
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    stats["hedge_won"] += task is not tasks[0]
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
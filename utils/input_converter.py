@@ -1,52 +1,255 @@
+import io
 import os
+import logging
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber
 import pandas as pd
+from utils.cache import TTLCache
+from utils.serializer import (
+    OUTPUT_FORMATS, canonical_name, count_tokens, estimate_markdown_tokens, non_empty_columns, plan_columns, serialize_table,
+)
+from utils.symbol_index import SymbolIndex, get_symbol_index
+
+logger = logging.getLogger(__name__)
+
+CSV_CHUNK_ROWS = 50_000
+PARALLEL_PAGE_THRESHOLD = 16  # below this many pages the pool start-up costs more than it saves
+
+# Bump when the converted output format changes so stale cache entries are ignored
+CONVERTER_VERSION = "6"
+
+
+def _dedup_columns(columns):
+    """Ensure unique column names by appending suffix if needed."""
+    seen = {}
+    new_cols = []
+    for col in columns:
+        if col in seen:
+            seen[col] += 1
+            new_cols.append(f"{col}_{seen[col]}")
+        else:
+            seen[col] = 0
+            new_cols.append(col)
+    return new_cols
+
+
+def _extract_page_tables(source, page_numbers: list[int]) -> list[tuple[int, list]]:
+    """
+    Extract the first table from each of the given (1-based) pages.
+    Runs in a worker process; `source` is a path or the raw PDF bytes.
+    """
+    tables = []
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        for page_num in page_numbers:
+            page = pdf.pages[page_num - 1]
+            # The default table finder needs ruling lines; pages without any cannot hold a table
+            if page.lines or page.rects:
+                table = page.extract_table()
+                if table:
+                    tables.append((page_num, table))
+            page.close()
+    return tables
+
 
 class InputConverter:
-    def convert(self, file_path: str) -> str:
-        ext = os.path.splitext(file_path)[-1].lower()
-        if ext == ".csv":
-            return self._convert_csv(file_path)
-        elif ext == ".pdf":
-            return self._convert_pdf(file_path)
+    """
+    Converts CSV/PDF portfolios to text for the agents. The default "compact" format maps
+    broker columns to the canonical schema and emits unpadded pipe-delimited rows;
+    "jsonl" emits one JSON object per row and "markdown" keeps the original tables.
+    `convert_with_stats` also returns token counts of the markdown and chosen output.
+    A converter keeps no per-call state, so threads can share one.
+    Holdings are resolved against the local symbol index so every row carries its
+    ticker, sector and asset class before any agent sees it.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        cache: TTLCache | None = None,
+        output_format: str = "compact",
+        symbols: SymbolIndex | None = None,
+        resolve_symbols: bool = True,
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache if cache else TTLCache("converted_inputs", ttl=7 * 24 * 3600)
+        self.output_format = output_format
+        self.symbols = (symbols if symbols else get_symbol_index()) if resolve_symbols else None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def convert(self, source, file_type: str | None = None) -> str:
+        """
+        Convert a portfolio file to table text.
+        `source` is a path, raw bytes or a binary file-like object; for the latter two
+        pass `file_type` ("csv" / "pdf") or it is sniffed from the content.
+        """
+        return self.convert_with_stats(source, file_type)[0]
+
+    def convert_with_stats(self, source, file_type: str | None = None) -> tuple[str, dict]:
+        """convert(), plus the output format and its token count against (an estimate for) the same tables as markdown."""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                data = f.read()
+            ext = os.path.splitext(source)[-1].lower()
         else:
+            data = source if isinstance(source, bytes) else source.read()
+            ext = f".{file_type.lower().lstrip('.')}" if file_type else (".pdf" if data[:5] == b"%PDF-" else ".csv")
+
+        if ext not in (".csv", ".pdf"):
             raise ValueError(f"Unsupported file type: {ext}")
 
-    def _convert_csv(self, file_path: str) -> str:
-        df = pd.read_csv(file_path)
-        return df.to_markdown(index=False)
-
-    def _convert_pdf(self, file_path: str) -> str:
-        def _dedup_columns(columns):
-            """Ensure unique column names by appending suffix if needed."""
-            seen = {}
-            new_cols = []
-            for col in columns:
-                if col in seen:
-                    seen[col] += 1
-                    new_cols.append(f"{col}_{seen[col]}")
-                else:
-                    seen[col] = 0
-                    new_cols.append(col)
-            return new_cols
+        symbols_version = self.symbols.version if self.symbols else "none"
+        key = f"{CONVERTER_VERSION}:{self.output_format}:{symbols_version}:{ext}:{hashlib.sha256(data).hexdigest()}"
+        cached = self.cache.get(key)
+        if cached is None:
+            text, markdown_tokens = self._convert_csv(data) if ext == ".csv" else self._convert_pdf(data)
+            output_tokens = count_tokens(text)
+            if self.output_format == "markdown":
+                markdown_tokens = output_tokens
+            cached = {
+                "text": text,
+                "stats": {
+                    "format": self.output_format,
+                    "markdown_tokens": markdown_tokens,
+                    "output_tokens": output_tokens,
+                    "saved_pct": round((1 - output_tokens / markdown_tokens) * 100, 1) if markdown_tokens else 0.0,
+                },
+            }
+            self.cache.set(key, cached)
+
+        stats = cached["stats"]
+        logger.info(
+            "Converted %s portfolio: %d markdown tokens -> %d %s tokens",
+            ext, stats["markdown_tokens"], stats["output_tokens"], self.output_format,
+        )
+        return cached["text"], stats
+
+    def _render(self, df: pd.DataFrame, plan, header: bool = True) -> tuple[str, int]:
+        """
+        The table in the output format and its estimated token count as markdown (0 when the
+        output is markdown). The estimate avoids rendering a markdown table only to count it.
+        """
+        if self.output_format == "markdown":
+            markdown = df.to_markdown(index=False)
+            return (markdown if header else markdown.split("\n", 2)[2]), 0
+        return serialize_table(df, self.output_format, plan, header=header), estimate_markdown_tokens(df)
+
+    def _roles(self, columns) -> dict | None:
+        """Canonical field -> first column for it, for tables the symbol index can resolve; else None."""
+        if self.symbols is None:
+            return None
+        roles = {}
+        for column in columns:
+            roles.setdefault(canonical_name(column), column)
+        return roles if "asset" in roles or "ticker" in roles else None
+
+    def _resolve(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Attach ticker / sector / asset_class from the symbol index to tables that list assets."""
+        roles = self._roles(df.columns)
+        if roles is None:
+            return df
+        return self.symbols.enrich(
+            df,
+            asset_column=roles.get("asset", roles.get("ticker")),
+            ticker_column=roles.get("ticker"),
+            sector_column=roles.get("sector"),
+            asset_class_column=roles.get("asset_class"),
+        )
+
+    def _csv_non_empty(self, data: bytes) -> set:
+        """
+        Columns that will hold a value once resolved, from a parse-only pass: the non-empty raw
+        columns plus each column the symbol index fills in for at least one listed asset.
+        Assets are only looked up until every such column is known to be filled.
+        """
+        non_empty, seen = set(), set()
+        for chunk in pd.read_csv(io.BytesIO(data), chunksize=CSV_CHUNK_ROWS, dtype=str):
+            non_empty |= non_empty_columns(chunk)
+            roles = self._roles(chunk.columns)
+            if roles is None:
+                continue
+            filled = {field: roles.get(field, field) for field in ("ticker", "sector", "asset_class")}
+            for field in ("asset", "ticker"):
+                for query in chunk[roles[field]].dropna().unique() if field in roles else ():
+                    pending = {f: c for f, c in filled.items() if c not in non_empty}
+                    if not pending:
+                        break
+                    if query in seen:
+                        continue
+                    seen.add(query)
+                    symbol = self.symbols.lookup(query)
+                    if symbol is not None:
+                        non_empty.update(c for f, c in pending.items() if getattr(symbol, f))
+        return non_empty
+
+    def _convert_csv(self, data: bytes) -> tuple[str, int]:
+        # Read in chunks so very large exports never sit in one DataFrame. A parse-only first
+        # pass finds the non-empty columns; the second resolves and renders every chunk as it
+        # is read, all with the same schema, the header once and later chunks only their rows.
+        non_empty = self._csv_non_empty(data)
+        plan, parts, markdown_tokens = None, [], 0
+        for i, chunk in enumerate(pd.read_csv(io.BytesIO(data), chunksize=CSV_CHUNK_ROWS)):
+            chunk = self._resolve(chunk)
+            if plan is None:
+                plan = plan_columns(chunk.columns, non_empty)
+            text, tokens = self._render(chunk, plan, header=(i == 0))
+            parts.append(text)
+            markdown_tokens += tokens
+        return "\n".join(p for p in parts if p), markdown_tokens
+
+    def _convert_pdf(self, data: bytes) -> tuple[str, int]:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            page_count = len(pdf.pages)
+
+        page_numbers = list(range(1, page_count + 1))
+        workers = min(self.max_workers, page_count)
+        if page_count < PARALLEL_PAGE_THRESHOLD or workers < 2:
+            extracted = _extract_page_tables(data, page_numbers)
+        else:
+            chunks = [page_numbers[i::workers] for i in range(workers)]
+            pool = self._get_pool()
+            extracted = [t for result in pool.map(_extract_page_tables, [data] * workers, chunks) for t in result]
+            extracted.sort(key=lambda t: t[0])
 
         all_tables = []
-        with pdfplumber.open(file_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                table = page.extract_table()
-                if table:
-                    df = pd.DataFrame(table[1:], columns=_dedup_columns(table[0]))
-                    df["__page__"] = page_num  # keep track of page number
-                    all_tables.append(df)
+        for page_num, table in extracted:
+            df = self._resolve(pd.DataFrame(table[1:], columns=_dedup_columns(table[0])))
+            df["__page__"] = page_num  # keep track of page number
+            all_tables.append(df)
 
         if not all_tables:
             raise ValueError("No tables found in PDF.")
 
-        # Format all tables separately into Markdown
-        combined_markdown = ""
+        # Format all tables separately
+        combined, markdown_tokens = "", 0
         for i, df in enumerate(all_tables, start=1):
-            combined_markdown += f"\n### Table {i} (Page {df['__page__'].iloc[0]})\n"
-            combined_markdown += df.drop(columns="__page__").to_markdown(index=False)
-            combined_markdown += "\n"
+            page = df["__page__"].iloc[0]
+            df = df.drop(columns="__page__")
+            if self.output_format == "markdown":
+                combined += f"\n### Table {i} (Page {page})\n"
+            else:
+                combined += f"\n# table {i} page {page}\n"
+            text, tokens = self._render(df, plan_columns(df.columns, non_empty_columns(df)))
+            combined += text + "\n"
+            markdown_tokens += tokens
+
+        return combined, markdown_tokens
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Converters run in threads (batch.py, the app), and forking a multithreaded process
+        # can deadlock the child, so workers are spawned
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
 
-        return combined_markdown
\ No newline at end of file
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
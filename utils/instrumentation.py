@@ -0,0 +1,201 @@
+"""
+Opt-in tracing for PortfolioWorkflow.
+
+Set PORTFOLIAI_TRACE to a JSONL path (or to "1" for ./traces.jsonl) and every node,
+LLM call and google_search call is recorded with wall time, queue time, tokens in/out,
+tool-call counts and cache hits; LLM calls also carry their execution policy outcome
+(attempts, retries, timeouts, hedges, fallback). `get_tracer().format_summary()` prints per-span p50/p95.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.stats import percentile
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+_current_run: ContextVar["RunContext | None"] = ContextVar("current_run", default=None)
+
+
+class RunContext:
+    """Per-run bookkeeping: node end times so queue time can be measured against predecessors."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = time.perf_counter()
+        self.node_ends: dict[str, float] = {}
+
+
+class Span:
+    def __init__(self, kind: str, name: str, run_id: str | None, parent: "Span | None", queue_s: float = 0.0):
+        self.kind = kind
+        self.name = name
+        self.run_id = run_id
+        self.parent = parent
+        self.queue_s = queue_s
+        self.start = time.perf_counter()
+        self.wall_s = 0.0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.cache_hits = 0
+        self.cache_hit = None
+        self.attributes = {}
+        self.error = None
+
+    def to_dict(self) -> dict:
+        record = {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "wall_s": round(self.wall_s, 4),
+            "queue_s": round(self.queue_s, 4),
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "cache_hits": self.cache_hits,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+            "ts": time.time(),
+        }
+        record.update(self.attributes)
+        return record
+
+
+class Tracer:
+    def __init__(self, path: str | None = None, max_spans: int = 10_000):
+        self.path = path
+        self.enabled = path is not None
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    # --- Runs and spans ---
+    @contextmanager
+    def run(self):
+        token = _current_run.set(RunContext() if self.enabled else None)
+        try:
+            yield
+        finally:
+            _current_run.reset(token)
+
+    @contextmanager
+    def span(self, kind: str, name: str, predecessors: tuple = ()):
+        if not self.enabled:
+            yield None
+            return
+
+        run = _current_run.get()
+        parent = _current_span.get()
+        queue_s = 0.0
+        if run is not None and kind == "node":
+            ready_at = max((run.node_ends.get(p, run.started_at) for p in predecessors), default=run.started_at)
+            queue_s = max(0.0, time.perf_counter() - ready_at)
+
+        span = Span(kind, name, run.run_id if run else None, parent, queue_s)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.wall_s = time.perf_counter() - span.start
+            if run is not None and kind == "node":
+                run.node_ends[name] = time.perf_counter()
+            if parent is not None:
+                # Roll counts up: tool calls happen inside LLM calls, which happen inside nodes
+                parent.tool_calls += span.tool_calls + (kind == "tool")
+                parent.cache_hits += span.cache_hits + bool(span.cache_hit)
+                parent.llm_calls += span.llm_calls + (kind == "llm")
+                parent.tokens_in += span.tokens_in
+                parent.tokens_out += span.tokens_out
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            self.spans.append(record)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    # --- Aggregation ---
+    def summary(self) -> list[dict]:
+        """Per (kind, name): count, p50/p95 wall and queue time, mean tokens and cache hit rate."""
+        groups = {}
+        for record in list(self.spans):
+            groups.setdefault((record["kind"], record["name"]), []).append(record)
+
+        rows = []
+        for (kind, name), records in sorted(groups.items()):
+            walls = [r["wall_s"] for r in records]
+            queues = [r["queue_s"] for r in records]
+            hits = [r["cache_hit"] for r in records if r["cache_hit"] is not None]
+            rows.append({
+                "kind": kind,
+                "name": name,
+                "count": len(records),
+                "p50_s": _percentile(walls, 50),
+                "p95_s": _percentile(walls, 95),
+                "queue_p95_s": _percentile(queues, 95),
+                "tokens_in": round(sum(r["tokens_in"] for r in records) / len(records)),
+                "tokens_out": round(sum(r["tokens_out"] for r in records) / len(records)),
+                "tool_calls": sum(r["tool_calls"] for r in records),
+                "cache_hit_rate": round(sum(hits) / len(hits), 2) if hits else None,
+                # Execution policy outcomes (LLM spans only)
+                "retries": sum(r.get("retries", 0) for r in records),
+                "timeouts": sum(r.get("timeouts", 0) for r in records),
+                "hedged": sum(r.get("hedged", 0) for r in records),
+                "hedge_won": sum(r.get("hedge_won", 0) for r in records),
+                "fallbacks": sum(bool(r.get("fallback")) for r in records),
+            })
+        return rows
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "No trace data recorded."
+        columns = list(rows[0].keys())
+        lines = ["|".join(columns)]
+        lines.extend("|".join(str(row[c]) for c in columns) for row in rows)
+        return "\n".join(lines)
+
+
+def current_span() -> Span | None:
+    """The innermost open span, e.g. the LLM or tool call being made (None when tracing is off)."""
+    return _current_span.get()
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    return round(percentile(values, pct), 4)
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer, enabled by the PORTFOLIAI_TRACE environment variable."""
+    global _tracer
+    if _tracer is None:
+        from utils.model_setup import load_env
+        load_env()
+        path = os.getenv("PORTFOLIAI_TRACE")
+        if path in ("1", "true", "yes"):
+            path = "traces.jsonl"
+        _tracer = Tracer(path or None)
+    return _tracer
+
+
+def enable_tracing(path: str = "traces.jsonl") -> Tracer:
+    """Turn tracing on programmatically (e.g. from a --profile flag)."""
+    tracer = get_tracer()
+    tracer.path = path
+    tracer.enabled = True
+    return tracer
@@ -0,0 +1,154 @@
+"""
+Response cache for agent runs.
+
+Entries are keyed on the normalized prompt together with the agent's instructions, model,
+settings and tools. Normalization collapses whitespace, sorts the rows of pipe-delimited
+tables and rounds numbers to LLM_CACHE_PRECISION significant digits. A prompt that differs
+from an earlier one only in spacing, row order or trivial numeric drift therefore reuses
+the earlier answer.
+
+With LLM_CACHE_NEAR_DUP set to a Jaccard threshold (e.g. 0.9), an exact miss falls back to
+a MinHash / LSH lookup over word shingles. This reuses the answer for an essentially
+identical prompt from the same agent.
+"""
+import re
+import json
+import hashlib
+import numpy as np
+from utils.cache import TTLCache
+from utils.model_setup import setting
+
+LLM_CACHE_TTL = setting("LLM_CACHE_TTL", 12 * 3600)
+LLM_CACHE_PRECISION = setting("LLM_CACHE_PRECISION", 3, int)
+LLM_CACHE_NEAR_DUP = setting("LLM_CACHE_NEAR_DUP", 0)
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs at ~0.8 Jaccard collide in some band with high probability
+
+_NUMBER = re.compile(r"-?\d+(?:,\d{3})*(?:\.\d+)?")
+_MERSENNE = np.uint64(4294967311)  # prime just above 2**32, so a*h + b fits in uint64
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, 2 ** 32, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+
+
+# === Normalization ===
+def _round_number(match: re.Match, precision: int) -> str:
+    text = match.group().replace(",", "")
+    value = float(text)
+    if "." not in text and abs(value) < 10_000:
+        return text  # small integers (quantities, years) are kept exact
+    return f"{value:.{precision}g}"
+
+
+def normalize_prompt(text: str, precision: int = LLM_CACHE_PRECISION) -> str:
+    """Whitespace-collapsed text with table rows sorted and numbers rounded to `precision` significant digits."""
+    text = _NUMBER.sub(lambda m: _round_number(m, precision), str(text))
+    lines = [re.sub(r"\s+", " ", line).strip() for line in text.splitlines()]
+    out, rows = [], []
+    for line in lines:
+        if line and set(line) <= set("|-: "):
+            continue  # markdown table separator
+        if "|" in line:
+            rows.append(line)
+            continue
+        if rows:
+            # Keep a table's header in place and sort its body
+            out.extend(rows[:1] + sorted(rows[1:]))
+            rows = []
+        if line:
+            out.append(line)
+    out.extend(rows[:1] + sorted(rows[1:]))
+    return "\n".join(out)
+
+
+def agent_fingerprint(agent) -> str:
+    """Everything about the agent that changes its answer: instructions, model, settings and tools."""
+    settings = getattr(agent, "model_settings", None)
+    return json.dumps([
+        agent.name,
+        re.sub(r"\s+", " ", str(agent.instructions)).strip(),
+        str(getattr(agent.model, "model", agent.model)),
+        repr(settings),
+        sorted(getattr(tool, "name", str(tool)) for tool in agent.tools),
+        repr(getattr(agent, "output_type", None)),
+    ])
+
+
+# === MinHash ===
+def minhash(text: str) -> np.ndarray:
+    words = text.split()
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE).min(axis=0)
+
+
+def _bands(signature: np.ndarray) -> list[str]:
+    rows = NUM_PERM // BANDS
+    return [hashlib.blake2b(signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).hexdigest() for i in range(BANDS)]
+
+
+# === Cache ===
+class LLMResponseCache:
+    def __init__(self, cache: TTLCache | None = None, near_dup_threshold: float = LLM_CACHE_NEAR_DUP):
+        self.cache = cache if cache else TTLCache("llm_responses", ttl=LLM_CACHE_TTL)
+        self.near_dup_threshold = near_dup_threshold
+
+    @staticmethod
+    def _scope(agent) -> str:
+        return hashlib.sha256(agent_fingerprint(agent).encode("utf-8")).hexdigest()[:16]
+
+    def key(self, agent, input: str) -> str:
+        payload = json.dumps([agent_fingerprint(agent), normalize_prompt(input)])
+        return "exact:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, agent, input: str) -> tuple[object, str | None]:
+        """(output, "exact" | "near") on a hit, (None, None) on a miss."""
+        entry = self.cache.get(self.key(agent, input))
+        if entry is not None:
+            return entry["output"], "exact"
+        if not self.near_dup_threshold:
+            return None, None
+
+        scope = self._scope(agent)
+        signature = minhash(normalize_prompt(input))
+        candidates = set()
+        for i, band in enumerate(_bands(signature)):
+            candidates.update(self.cache.get(f"band:{scope}:{i}:{band}", []))
+        best, best_score = None, self.near_dup_threshold
+        for key in candidates:
+            entry = self.cache.get(key)
+            if entry is None or "signature" not in entry:
+                continue
+            score = float(np.mean(np.asarray(entry["signature"], dtype=np.uint64) == signature))
+            if score >= best_score:
+                best, best_score = entry, score
+        return (best["output"], "near") if best else (None, None)
+
+    def set(self, agent, input: str, output) -> None:
+        key = self.key(agent, input)
+        if not self.near_dup_threshold:
+            self.cache.set(key, {"output": output})
+            return
+        signature = minhash(normalize_prompt(input))
+        self.cache.set(key, {"output": output, "signature": signature.tolist()})
+        scope = self._scope(agent)
+        for i, band in enumerate(_bands(signature)):
+            bucket_key = f"band:{scope}:{i}:{band}"
+            bucket = self.cache.get(bucket_key, [])
+            if key not in bucket:
+                self.cache.set(bucket_key, (bucket + [key])[-32:])
+
+
+_llm_cache = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
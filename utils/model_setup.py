@@ -1,18 +1,52 @@
 import os
-from dotenv import load_dotenv
-from agents import OpenAIChatCompletionsModel, AsyncOpenAI
+from functools import lru_cache
 
-load_dotenv(override=True)
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
 
-gemini_client = AsyncOpenAI(
-    api_key = GEMINI_API_KEY,
-    base_url = GEMINI_BASE_URL
-)
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load `.env` once, on first use rather than at import time."""
+    from dotenv import load_dotenv
+    load_dotenv(override=True)
 
-gemini_model = OpenAIChatCompletionsModel(
-    model = 'gemini-2.5-flash',
-    openai_client = gemini_client
-)
\ No newline at end of file
+
+def setting(name: str, default, cast=float):
+    """Read a setting from the environment or `.env`, whichever module asks first."""
+    load_env()
+    return cast(os.getenv(name, default))
+
+
+@lru_cache(maxsize=None)
+def get_gemini_client():
+    from agents import AsyncOpenAI
+    load_env()
+    # Retries are handled by the per-node execution policy, not by the client
+    return AsyncOpenAI(
+        api_key = os.getenv("GEMINI_API_KEY"),
+        base_url = os.getenv("GEMINI_BASE_URL"),
+        max_retries = 0
+    )
+
+
+@lru_cache(maxsize=None)
+def get_model(name: str):
+    # Every request is scheduled through the shared Gemini rate limiter
+    from utils.rate_limited_model import RateLimitedModel
+    return RateLimitedModel(
+        model = name,
+        openai_client = get_gemini_client()
+    )
+
+
+def get_gemini_model():
+    return get_model(GEMINI_MODEL_NAME)
+
+
+def __getattr__(name):
+    # Keep `from utils.model_setup import gemini_model` working without eager construction
+    if name == "gemini_client":
+        return get_gemini_client()
+    if name == "gemini_model":
+        return get_gemini_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
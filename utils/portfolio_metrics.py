@@ -0,0 +1,251 @@
+import re
+import json
+import logging
+import numpy as np
+import pandas as pd
+from utils.serializer import COLUMN_ALIASES, normalize_header
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 5
+
+_BLANK = ("", "None", "nan", "NaN")
+# Broker statements often end with subtotal / total lines that are not holdings; they carry
+# no quantity, which tells them apart from holdings such as "Total Energies"
+_TOTAL_ROW = re.compile(r"^(sub\s*-?\s*total|grand\s+total|totals?)\b", re.IGNORECASE)
+# Currency codes and symbols; "Rs." must go before stray dots are kept as decimal points
+_CURRENCY = re.compile(r"\b(?:rs|inr|usd|eur|gbp)\b\.?|[₹$€£¥]", re.IGNORECASE)
+_ACCOUNTING_NEGATIVE = re.compile(r"^\((.*)\)$")
+
+
+def _parse_number(series: pd.Series) -> pd.Series:
+    """
+    Strip currency codes and symbols, thousands separators and % signs, then coerce to
+    float. Accounting negatives such as (1,234) become -1234.
+    """
+    cleaned = series.astype(str).str.replace(_CURRENCY, "", regex=True).str.strip()
+    cleaned = cleaned.str.replace(_ACCOUNTING_NEGATIVE, r"-\1", regex=True)
+    cleaned = cleaned.str.replace(r"[^0-9.\-]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def _parse_tables(text: str) -> list[pd.DataFrame]:
+    """
+    Split InputConverter output into one DataFrame per table. Handles markdown tables,
+    the compact pipe-delimited form and JSON lines; headings and blank lines separate tables.
+    Short rows are padded with blank cells; rows with more cells than the header cannot be
+    aligned and are counted in the table's `attrs["skipped_rows"]`.
+    """
+    tables, rows, records = [], [], []
+    markdown = False  # whether the current table's header was written as | a | b |
+
+    def flush():
+        if len(rows) > 1:
+            header = rows[0]
+            body = [r + [""] * (len(header) - len(r)) for r in rows[1:] if len(r) <= len(header)]
+            table = pd.DataFrame(body, columns=header)
+            table.attrs["skipped_rows"] = len(rows) - 1 - len(body)
+            tables.append(table)
+        if records:
+            tables.append(pd.DataFrame.from_records(records).fillna(""))
+        rows.clear()
+        records.clear()
+
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                records.append(json.loads(line))
+                continue
+            except json.JSONDecodeError:
+                pass
+        if "|" in line and not line.startswith("#"):
+            if not rows:
+                markdown = line.startswith("|") and line.endswith("|")
+            if markdown and line.startswith("|") and line.endswith("|"):
+                # Drop only the outer pipes so blank first and last cells are kept
+                line = line[1:-1]
+            cells = [c.strip() for c in line.split("|")]
+            if not all(re.fullmatch(r":?-+:?", c) for c in cells if c):
+                rows.append(cells)
+            continue
+        flush()
+    flush()
+    return tables
+
+
+def parse_holdings(portfolio_data: str) -> pd.DataFrame:
+    """
+    Parse InputConverter output into a typed holdings frame with the columns
+    asset, ticker, asset_class, quantity, cost_basis, current_value and sector.
+    Total / subtotal lines are dropped and a row without an asset name is named by its
+    ticker. Rows that could not be read (misaligned, or without an asset or value) are
+    counted in `attrs["skipped_rows"]` and logged.
+    Raises ValueError when no recognizable holdings table is found.
+    """
+    frames, skipped = [], 0
+    for table in _parse_tables(portfolio_data):
+        skipped += table.attrs.get("skipped_rows", 0)
+        headers = {normalize_header(c): c for c in table.columns}
+        mapped = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in headers:
+                    mapped[field] = headers[alias]
+                    break
+        if "asset" not in mapped and "ticker" in mapped:
+            mapped["asset"] = mapped["ticker"]
+        if "asset" not in mapped or not ({"current_value", "current_price"} & mapped.keys()):
+            continue
+
+        df = pd.DataFrame({"asset": table[mapped["asset"]].astype(str).str.strip()})
+        for field in ("ticker", "asset_class"):
+            df[field] = table[mapped[field]].astype(str).str.strip() if field in mapped else ""
+            df.loc[df[field].isin(_BLANK), field] = ""
+        # A row with only a ticker is still a holding
+        df["asset"] = df["asset"].where(~df["asset"].isin(_BLANK), df["ticker"])
+        quantity = _parse_number(table[mapped["quantity"]]) if "quantity" in mapped else pd.Series(np.nan, index=table.index)
+        df["quantity"] = quantity
+
+        if "current_value" in mapped:
+            df["current_value"] = _parse_number(table[mapped["current_value"]])
+        else:
+            df["current_value"] = _parse_number(table[mapped["current_price"]]) * quantity
+
+        if "cost_basis" in mapped:
+            df["cost_basis"] = _parse_number(table[mapped["cost_basis"]])
+        elif "purchase_price" in mapped:
+            df["cost_basis"] = _parse_number(table[mapped["purchase_price"]]) * quantity
+        else:
+            df["cost_basis"] = np.nan
+
+        df["sector"] = table[mapped["sector"]].astype(str).str.strip() if "sector" in mapped else "Unclassified"
+        df.loc[df["sector"].isin(["", "None", "nan"]), "sector"] = "Unclassified"
+        frames.append(df)
+
+    if not frames:
+        raise ValueError("No holdings table found in portfolio data.")
+
+    holdings = pd.concat(frames, ignore_index=True)
+    holdings = holdings[~(holdings["asset"].str.match(_TOTAL_ROW) & holdings["quantity"].isna())]
+    usable = holdings["asset"].ne("") & holdings["current_value"].notna()
+    # Rows with no cells at all are spacing, not holdings
+    blank = holdings["asset"].eq("") & holdings[["quantity", "cost_basis", "current_value"]].isna().all(axis=1)
+    skipped += int((~usable & ~blank).sum())
+    holdings = holdings[usable]
+    if holdings.empty:
+        raise ValueError("Holdings table has no rows with a current value.")
+    if skipped:
+        logger.warning("Skipped %d portfolio rows that could not be read", skipped)
+    holdings = holdings.reset_index(drop=True)
+    holdings.attrs["skipped_rows"] = skipped
+    return holdings
+
+
+def compute_metrics(holdings: pd.DataFrame, top_n: int = TOP_N) -> dict:
+    """Compute allocation, unrealized P&L, concentration and sector weights in one pass."""
+    value = holdings["current_value"].to_numpy(dtype=float)
+    cost = holdings["cost_basis"].to_numpy(dtype=float)
+    total_value = value.sum()
+    weights = value / total_value if total_value else np.zeros_like(value)
+
+    pnl = value - cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(cost > 0, pnl / cost * 100, np.nan)
+
+    order = np.argsort(-weights)
+    sector_weights = (
+        pd.Series(weights, index=holdings["sector"].to_numpy())
+        .groupby(level=0).sum()
+        .sort_values(ascending=False)
+    )
+    # Without any cost data there is no cost or P&L to report, rather than a total of 0
+    has_cost = bool(np.isfinite(cost).any())
+    total_cost = np.nansum(cost) if has_cost else None
+    total_pnl = np.nansum(pnl) if has_cost else None
+
+    asset_class_weights = (
+        pd.Series(weights, index=holdings["asset_class"].replace("", "Unknown").to_numpy())
+        .groupby(level=0).sum()
+        .sort_values(ascending=False)
+    )
+
+    holding_rows = pd.DataFrame({
+        "asset": holdings["asset"].to_numpy(),
+        "ticker": holdings["ticker"].to_numpy(),
+        "sector": holdings["sector"].to_numpy(),
+        "quantity": holdings["quantity"].to_numpy(),
+        "current_value": value,
+        "cost_basis": cost,
+        "allocation_pct": weights * 100,
+        "unrealized_pnl": pnl,
+        "unrealized_pnl_pct": pnl_pct,
+    }).iloc[order].round(2)
+
+    return {
+        "num_holdings": int(len(holdings)),
+        "skipped_rows": int(holdings.attrs.get("skipped_rows", 0)),
+        "total_value": round(float(total_value), 2),
+        "total_cost": round(float(total_cost), 2) if has_cost else None,
+        "total_unrealized_pnl": round(float(total_pnl), 2) if has_cost else None,
+        "total_unrealized_pnl_pct": round(float(total_pnl / total_cost * 100), 2) if has_cost and total_cost else None,
+        "hhi": round(float(np.sum(weights ** 2)), 4),
+        "top_n": top_n,
+        "top_n_concentration_pct": round(float(weights[order[:top_n]].sum() * 100), 2),
+        "sector_weights_pct": {k: round(float(v * 100), 2) for k, v in sector_weights.items()},
+        "asset_class_weights_pct": {k: round(float(v * 100), 2) for k, v in asset_class_weights.items()},
+        "holdings": holding_rows.replace({np.nan: None}).to_dict(orient="records"),
+    }
+
+
+def format_metrics(metrics: dict) -> str:
+    """Render computed metrics as compact text for agent prompts."""
+    lines = [
+        f"Holdings: {metrics['num_holdings']}"
+        + (f" ({metrics['skipped_rows']} unreadable rows left out)" if metrics.get("skipped_rows") else ""),
+        f"Total value: {metrics['total_value']}",
+    ]
+    if metrics["total_cost"] is not None:
+        lines.append(f"Total cost: {metrics['total_cost']}")
+        pct = metrics["total_unrealized_pnl_pct"]
+        lines.append(f"Unrealized P&L: {metrics['total_unrealized_pnl']}" + (f" ({pct}%)" if pct is not None else ""))
+    lines += [
+        f"HHI: {metrics['hhi']}",
+        f"Top {metrics['top_n']} concentration: {metrics['top_n_concentration_pct']}%",
+        "Sector weights: " + ", ".join(f"{k} {v}%" for k, v in metrics["sector_weights_pct"].items()),
+        "Asset class weights: " + ", ".join(f"{k} {v}%" for k, v in metrics["asset_class_weights_pct"].items()),
+        "asset|ticker|sector|qty|value|cost|alloc%|pnl|pnl%",
+    ]
+    for h in metrics["holdings"]:
+        lines.append("|".join(str(h[k]) for k in (
+            "asset", "ticker", "sector", "quantity", "current_value", "cost_basis",
+            "allocation_pct", "unrealized_pnl", "unrealized_pnl_pct",
+        )))
+    return "\n".join(lines)
+
+
+def diff_holdings(previous: dict, current: dict) -> dict:
+    """Holdings added, removed or changed (quantity or value) between two metrics dicts, keyed by ticker or asset."""
+    def by_key(metrics):
+        return {h.get("ticker") or h["asset"]: h for h in metrics["holdings"]}
+
+    before, after = by_key(previous), by_key(current)
+    changed = [
+        {"asset": after[k]["asset"], **{f: [before[k][f], after[k][f]] for f in ("quantity", "current_value")
+                                        if before[k][f] != after[k][f]}}
+        for k in after.keys() & before.keys()
+        if any(before[k][f] != after[k][f] for f in ("quantity", "current_value"))
+    ]
+    return {
+        "added": [after[k]["asset"] for k in after.keys() - before.keys()],
+        "removed": [before[k]["asset"] for k in before.keys() - after.keys()],
+        "changed": changed,
+    }
+
+
+def analyze_portfolio_metrics(portfolio_data: str) -> dict | None:
+    """Parse and compute metrics, returning None when the input has no usable table."""
+    try:
+        return compute_metrics(parse_holdings(portfolio_data))
+    except ValueError:
+        return None
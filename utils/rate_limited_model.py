@@ -0,0 +1,52 @@
+import json
+from agents import OpenAIChatCompletionsModel
+from utils.rate_limiter import get_limiter
+
+# Output is unknown up front; reserve this much and settle against the real usage afterwards
+ESTIMATED_OUTPUT_TOKENS = 800
+
+
+def estimate_tokens(system_instructions, input) -> int:
+    text = input if isinstance(input, str) else json.dumps(input, default=str)
+    return (len(system_instructions or "") + len(text)) // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+def _retry_after(error) -> float:
+    try:
+        return float(error.response.headers.get("retry-after", 1.0))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
+
+
+class RateLimitedModel(OpenAIChatCompletionsModel):
+    """Chat Completions model whose every request (including tool-loop turns) goes through the Gemini limiter."""
+
+    async def get_response(self, system_instructions, input, *args, **kwargs):
+        import openai
+
+        limiter = get_limiter("gemini")
+        estimate = estimate_tokens(system_instructions, input)
+        await limiter.acquire(estimate)
+        try:
+            response = await super().get_response(system_instructions, input, *args, **kwargs)
+        except openai.RateLimitError as e:
+            await limiter.apenalize(_retry_after(e))
+            raise
+        await limiter.asettle(estimate, response.usage.input_tokens + response.usage.output_tokens)
+        return response
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        import openai
+
+        limiter = get_limiter("gemini")
+        estimate = estimate_tokens(system_instructions, input)
+        await limiter.acquire(estimate)
+        try:
+            async for event in super().stream_response(system_instructions, input, *args, **kwargs):
+                if event.type == "response.completed" and event.response.usage is not None:
+                    usage = event.response.usage
+                    await limiter.asettle(estimate, usage.input_tokens + usage.output_tokens)
+                yield event
+        except openai.RateLimitError as e:
+            await limiter.apenalize(_retry_after(e))
+            raise
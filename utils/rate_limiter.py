@@ -0,0 +1,331 @@
+"""
+Rate limiting for Gemini and Custom Search calls, shared by every process on the machine.
+
+Each API has one RateLimiter with token buckets for requests per second and tokens per
+minute, plus a daily request quota. Every Gemini model request and every search fetch
+acquires from its limiter first. The bucket levels, the daily count and the set of
+waiting callers live in a SQLite file in the cache directory and are updated in short
+`BEGIN IMMEDIATE` transactions, which async callers run in a worker thread so a busy
+database never blocks the event loop. The Streamlit app, `batch.py` and any other process
+using the same cache directory therefore draw on one budget, and the daily quota
+survives restarts.
+
+Callers are either interactive (the default) or batch (`priority_scope(BATCH)`). While an
+interactive caller in any process is waiting, batch callers hold back, and batch callers
+never draw the request bucket below `batch_reserve`. Interactive runs therefore go first
+even under a full batch load.
+"""
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.cache import DEFAULT_CACHE_DIR
+from utils.model_setup import setting
+from utils.stats import percentile
+
+INTERACTIVE, BATCH = "interactive", "batch"
+
+_priority: ContextVar[str] = ContextVar("request_priority", default=INTERACTIVE)
+
+MAX_SLEEP = 1.0  # re-check at least this often so a newly waiting interactive caller is noticed
+WAITER_STALE = 5 * MAX_SLEEP  # a waiter not seen for this long belongs to a process that died
+WAITER_REFRESH = WAITER_STALE / 2  # how often a throttled caller re-marks its waiter row as live
+
+
+class QuotaExceededError(RuntimeError):
+    """The daily request quota is used up; waiting would not help until the next UTC day."""
+
+
+@contextmanager
+def priority_scope(priority: str):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _today() -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        name: str,
+        rps: float = 0,
+        burst: int | None = None,
+        tpm: int = 0,
+        daily_quota: int = 0,
+        batch_reserve: float = 0.2,
+        cache_dir: str | None = None,
+    ):
+        """A limit of 0 disables that dimension. Limiters with the same name and cache_dir share state."""
+        self.name = name
+        self.rps = rps
+        self.burst = burst or max(1, int(rps))
+        self.tpm = tpm
+        self.daily_quota = daily_quota
+        self.batch_reserve = batch_reserve
+
+        self._lock = threading.RLock()  # guards the connection and the per-process stats
+        self._waiting = {INTERACTIVE: 0, BATCH: 0}  # this process only, for metrics
+        self._waits = deque(maxlen=1000)
+        self.stats = {"acquired": 0, "throttled": 0, "wait_s": 0.0, "tokens": 0,
+                      "quota_rejected": 0, "penalties": 0}
+
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "rate_limits.sqlite3"), timeout=30, isolation_level=None, check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, "
+            "refilled_at REAL NOT NULL, paused_until REAL NOT NULL, day TEXT NOT NULL, daily_used INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS waiters (name TEXT NOT NULL, waiter TEXT NOT NULL, priority TEXT NOT NULL, "
+            "seen_at REAL NOT NULL, PRIMARY KEY (name, waiter))"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?, ?, 0, ?, 0)",
+            (name, float(self.burst), float(tpm), time.time(), _today()),
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """One write transaction on the shared state; other processes wait on the SQLite lock."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    # --- Buckets ---
+    def _refill(self, db, now: float) -> dict:
+        requests, tokens, refilled_at, paused_until, day, daily_used = db.execute(
+            "SELECT requests, tokens, refilled_at, paused_until, day, daily_used FROM buckets WHERE name = ?",
+            (self.name,),
+        ).fetchone()
+        elapsed = max(0.0, now - refilled_at)
+        if self.rps:
+            requests = min(self.burst, requests + elapsed * self.rps)
+        if self.tpm:
+            tokens = min(self.tpm, tokens + elapsed * self.tpm / 60)
+        if day != _today():
+            day, daily_used = _today(), 0
+        return {"requests": requests, "tokens": tokens, "refilled_at": now, "paused_until": paused_until,
+                "day": day, "daily_used": daily_used}
+
+    def _save(self, db, state: dict) -> None:
+        db.execute(
+            "UPDATE buckets SET requests = ?, tokens = ?, refilled_at = ?, paused_until = ?, day = ?, daily_used = ? "
+            "WHERE name = ?",
+            (state["requests"], state["tokens"], state["refilled_at"], state["paused_until"], state["day"],
+             state["daily_used"], self.name),
+        )
+
+    def _try_take(self, cost: int, priority: str, waiter: str | None = None) -> float:
+        """
+        Take one request and `cost` tokens and return 0, or return how long to wait before retrying.
+        A `waiter` that has to wait is (re-)registered in the same transaction.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            state = self._refill(db, now)
+            wait = self._take(db, state, cost, priority, now)
+            self._save(db, state)
+            if wait and waiter is not None:
+                db.execute("INSERT OR REPLACE INTO waiters VALUES (?, ?, ?, ?)", (self.name, waiter, priority, now))
+        if wait is None:
+            with self._lock:
+                self.stats["quota_rejected"] += 1
+            raise QuotaExceededError(f"{self.name}: daily quota of {self.daily_quota} requests used up")
+        return wait
+
+    def _take(self, db, state: dict, cost: int, priority: str, now: float) -> float | None:
+        """Update `state` for one request; None when the daily quota is used up."""
+        if self.daily_quota and state["daily_used"] >= self.daily_quota:
+            return None
+        if now < state["paused_until"]:
+            return state["paused_until"] - now
+        if priority == BATCH and db.execute(
+            "SELECT 1 FROM waiters WHERE name = ? AND priority = ? AND seen_at > ? LIMIT 1",
+            (self.name, INTERACTIVE, now - WAITER_STALE),
+        ).fetchone():
+            return 0.05
+
+        floor = min(self.burst, 1 + (self.batch_reserve * self.burst if priority == BATCH else 0))
+        waits = []
+        if self.rps and state["requests"] < floor:
+            waits.append((floor - state["requests"]) / self.rps)
+        cost = min(cost, self.tpm) if self.tpm else 0
+        if cost and state["tokens"] < cost:
+            waits.append((cost - state["tokens"]) / (self.tpm / 60))
+        if waits:
+            return max(waits)
+
+        if self.rps:
+            state["requests"] -= 1
+        state["tokens"] -= cost
+        state["daily_used"] += 1
+        with self._lock:
+            self.stats["tokens"] += cost
+        return 0.0
+
+    def _leave(self, waiter: str) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM waiters WHERE name = ? AND waiter = ?", (self.name, waiter))
+
+    def _record(self, waited: float) -> float:
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["throttled"] += waited > 0
+            self.stats["wait_s"] += waited
+            self._waits.append(waited)
+        from utils.instrumentation import current_span
+        span = current_span()
+        if span is not None and waited:
+            key = f"{self.name}_wait_s"
+            span.attributes[key] = round(span.attributes.get(key, 0) + waited, 4)
+        return waited
+
+    # --- Acquire ---
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait for capacity for one request of about `tokens` tokens; returns the time spent waiting."""
+        priority, waiter = _priority.get(), uuid.uuid4().hex
+        wait = await asyncio.to_thread(self._try_take, tokens, priority, waiter)
+        if not wait:
+            return self._record(0.0)
+
+        # Throttled: we are now registered as a waiter so batch callers elsewhere can see us;
+        # the row is refreshed every WAITER_REFRESH seconds rather than on every pass
+        start = refreshed = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, MAX_SLEEP))
+                refresh = time.monotonic() - refreshed >= WAITER_REFRESH
+                wait = await asyncio.to_thread(self._try_take, tokens, priority, waiter if refresh else None)
+                refreshed = time.monotonic() if refresh else refreshed
+        finally:
+            await asyncio.to_thread(self._leave, waiter)
+            with self._lock:
+                self._waiting[priority] -= 1
+        return self._record(time.monotonic() - start)
+
+    def acquire_sync(self, tokens: int = 0) -> float:
+        """Blocking counterpart of `acquire` for the synchronous search path."""
+        priority, waiter = _priority.get(), uuid.uuid4().hex
+        wait = self._try_take(tokens, priority, waiter)
+        if not wait:
+            return self._record(0.0)
+
+        start = refreshed = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while wait:
+                time.sleep(min(wait, MAX_SLEEP))
+                refresh = time.monotonic() - refreshed >= WAITER_REFRESH
+                wait = self._try_take(tokens, priority, waiter if refresh else None)
+                refreshed = time.monotonic() if refresh else refreshed
+        finally:
+            self._leave(waiter)
+            with self._lock:
+                self._waiting[priority] -= 1
+        return self._record(time.monotonic() - start)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a request is known (may leave it in debt)."""
+        if not self.tpm:
+            return
+        correction = actual - min(estimated, self.tpm)
+        with self._transaction() as db:
+            db.execute("UPDATE buckets SET tokens = tokens - ? WHERE name = ?", (correction, self.name))
+        with self._lock:
+            self.stats["tokens"] += correction
+
+    async def asettle(self, estimated: int, actual: int) -> None:
+        await asyncio.to_thread(self.settle, estimated, actual)
+
+    def penalize(self, seconds: float = 1.0) -> None:
+        """The API answered 429: hold every caller back for a moment rather than letting them all retry."""
+        with self._transaction() as db:
+            db.execute("UPDATE buckets SET paused_until = MAX(paused_until, ?) WHERE name = ?",
+                       (time.time() + seconds, self.name))
+        with self._lock:
+            self.stats["penalties"] += 1
+
+    async def apenalize(self, seconds: float = 1.0) -> None:
+        await asyncio.to_thread(self.penalize, seconds)
+
+    # --- Metrics ---
+    def metrics(self) -> dict:
+        """This process's acquisitions and waits, plus the shared daily usage and waiters of every process."""
+        now = time.time()
+        with self._lock:
+            day, daily_used = self._db.execute(
+                "SELECT day, daily_used FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            waiting = dict(self._db.execute(
+                "SELECT priority, COUNT(*) FROM waiters WHERE name = ? AND seen_at > ? GROUP BY priority",
+                (self.name, now - WAITER_STALE),
+            ).fetchall())
+            daily_used = daily_used if day == _today() else 0
+            p95 = percentile(self._waits, 95)
+            return {
+                "limiter": self.name,
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+                "daily_used": daily_used,
+                "wait_p95_s": round(p95, 3),
+                "waiting_interactive": waiting.get(INTERACTIVE, 0),
+                "waiting_batch": waiting.get(BATCH, 0),
+                "daily_remaining": self.daily_quota - daily_used if self.daily_quota else None,
+            }
+
+
+# Gemini 2.5 Flash paid tier 1 and the Custom Search JSON API paid limits; lower them for free-tier keys
+DEFAULT_LIMITS = {
+    "gemini": {"rps": 15, "burst": 15, "tpm": 1_000_000, "daily_quota": 10_000},
+    "search": {"rps": 5, "burst": 10, "tpm": 0, "daily_quota": 10_000},
+}
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """
+    Shared limiter for "gemini" or "search", configured from the environment:
+    <NAME>_RPS, <NAME>_BURST, <NAME>_TPM and <NAME>_DAILY_QUOTA (0 disables a limit).
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            defaults = DEFAULT_LIMITS[name]
+            prefix = name.upper()
+            limiter = _limiters[name] = RateLimiter(
+                name,
+                rps=setting(f"{prefix}_RPS", defaults["rps"]),
+                burst=setting(f"{prefix}_BURST", defaults["burst"], int),
+                tpm=setting(f"{prefix}_TPM", defaults["tpm"], int),
+                daily_quota=setting(f"{prefix}_DAILY_QUOTA", defaults["daily_quota"], int),
+            )
+        return limiter
+
+
+def limiter_metrics() -> list[dict]:
+    return [limiter.metrics() for limiter in list(_limiters.values())]
+
@@ -0,0 +1,338 @@
+"""
+Typed agent outputs.
+
+Each agent replies with a JSON object that is parsed into one of the models below. The
+workflow state stores these models, and downstream agents get their `compact()` form (one
+line per fact) instead of the full prose. `markdown()` renders a model for the app, the
+CLI and batch output. A reply that is not valid JSON is kept as plain text in the model's
+main field, so a model that ignores the format degrades to the old free-text report.
+
+While a reply streams in, `MarkdownStream` parses the partial JSON and forwards the
+growing markdown rendering, so sections still appear token by token.
+"""
+import json
+import re
+import types
+from abc import abstractmethod
+from typing import Annotated, ClassVar, Literal, Union, get_args, get_origin
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, BeforeValidator, Field, ValidationError
+
+def _choice(*values: str, default: str):
+    """A lenient enum: case and spacing are normalized and any other value becomes `default`."""
+    def coerce(value):
+        value = str(value).strip().lower()
+        return value if value in values else default
+    return Annotated[Literal[values], BeforeValidator(coerce)]
+
+
+# An out-of-vocabulary value (e.g. "critical") must not fail the whole report
+Level = _choice("high", "medium", "low", default="medium")
+FindingKind = _choice("development", "risk", "opportunity", default="development")
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def _bullets(items: list[str]) -> str:
+    return "\n".join(f"- {item}" for item in items)
+
+
+def _domain(url: str | None) -> str | None:
+    if not url:
+        return None
+    return urlparse(url).netloc.removeprefix("www.") or url
+
+
+# === Models ===
+class Report(BaseModel):
+    TEXT_FIELD: ClassVar[str]
+
+    @property
+    def complete(self) -> bool:
+        """False for a report that is missing parts; such reports are not checkpointed or cached."""
+        return True
+
+    @classmethod
+    def from_text(cls, text: str) -> "Report":
+        return cls(**{cls.TEXT_FIELD: text.strip()})
+
+    @abstractmethod
+    def markdown(self) -> str:
+        ...
+
+    @abstractmethod
+    def compact(self) -> str:
+        ...
+
+
+class PortfolioReport(Report):
+    TEXT_FIELD: ClassVar[str] = "summary"
+
+    summary: str
+    allocation: list[str] = []
+    diversification: list[str] = []
+    observations: list[str] = []
+
+    def _sections(self):
+        return [("Asset Allocations", self.allocation), ("Diversification Analysis", self.diversification),
+                ("Observations", self.observations)]
+
+    def markdown(self) -> str:
+        parts = [f"### Summary\n{self.summary}"]
+        parts += [f"### {title}\n{_bullets(items)}" for title, items in self._sections() if items]
+        return "\n\n".join(parts)
+
+    def compact(self) -> str:
+        lines = [self.summary]
+        lines += [f"{title}: " + "; ".join(items) for title, items in self._sections() if items]
+        return "\n".join(lines)
+
+
+class Risk(BaseModel):
+    title: str
+    severity: Level = "medium"
+    category: str = ""
+    detail: str = ""
+
+
+class RiskReport(Report):
+    TEXT_FIELD: ClassVar[str] = "summary"
+
+    summary: str
+    risks: list[Risk] = []
+    mitigations: list[str] = []
+
+    def markdown(self) -> str:
+        parts = [f"### Summary of Key Risks\n{self.summary}"]
+        if self.risks:
+            rows = "\n".join(f"| {r.severity.title()} | {r.category} | {r.title} | {r.detail} |" for r in self.risks)
+            parts.append(f"### Risks\n| Severity | Category | Risk | Detail |\n|---|---|---|---|\n{rows}")
+        if self.mitigations:
+            parts.append(f"### Risk Mitigation Suggestions\n{_bullets(self.mitigations)}")
+        return "\n\n".join(parts)
+
+    def compact(self) -> str:
+        lines = [self.summary]
+        lines += [f"[{r.severity}] {r.category + ': ' if r.category else ''}{r.title} - {r.detail}" for r in self.risks]
+        if self.mitigations:
+            lines.append("Mitigations: " + "; ".join(self.mitigations))
+        return "\n".join(lines)
+
+
+class Finding(BaseModel):
+    kind: FindingKind = "development"
+    text: str
+    source: str | None = None
+
+
+class Research(Report):
+    TEXT_FIELD: ClassVar[str] = "overview"
+
+    subject: str = ""
+    overview: str = ""
+    findings: list[Finding] = []
+
+    def markdown(self) -> str:
+        parts = [f"### {self.subject}"] if self.subject else []
+        if self.overview:
+            parts.append(self.overview)
+        parts += [f"- **{f.kind.title()}:** {f.text}" + (f" ([source]({f.source}))" if f.source else "") for f in self.findings]
+        return "\n".join(parts)
+
+    def compact(self) -> str:
+        lines = [f"{self.subject}: {self.overview}".strip(": ")]
+        lines += [f"- {f.kind}: {f.text}" + (f" ({_domain(f.source)})" if f.source else "") for f in self.findings]
+        return "\n".join(lines)
+
+
+class ResearchReport(Report):
+    TEXT_FIELD: ClassVar[str] = "items"
+
+    items: list[Research] = []
+    missing: list[str] = Field(default=[], exclude=True)  # subjects whose research did not finish in time
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    @classmethod
+    def from_text(cls, text: str) -> "ResearchReport":
+        return cls(items=[Research(overview=text.strip())])
+
+    def markdown(self) -> str:
+        parts = [item.markdown() for item in self.items]
+        if self.missing:
+            parts.append("_Research did not finish in time for: " + ", ".join(self.missing) + "_")
+        return "\n\n".join(parts)
+
+    def compact(self) -> str:
+        return "\n".join(item.compact() for item in self.items)
+
+
+class Suggestion(BaseModel):
+    action: str
+    rationale: str = ""
+    priority: Level = "medium"
+
+
+class Recommendation(Report):
+    TEXT_FIELD: ClassVar[str] = "summary"
+
+    summary: str = ""
+    suggestions: list[Suggestion] = []
+    next_steps: list[str] = []
+
+    def markdown(self) -> str:
+        parts = [self.summary] if self.summary else []
+        if self.suggestions:
+            parts.append("### Personalized Suggestions\n" + "\n".join(
+                f"- **{s.action}** ({s.priority} priority) - {s.rationale}" for s in self.suggestions))
+        if self.next_steps:
+            parts.append("### Next Steps\n" + "\n".join(f"{i}. {step}" for i, step in enumerate(self.next_steps, 1)))
+        return "\n\n".join(parts)
+
+    def compact(self) -> str:
+        lines = [self.summary] if self.summary else []
+        lines += [f"[{s.priority}] {s.action} - {s.rationale}" for s in self.suggestions]
+        lines += [f"Next: {step}" for step in self.next_steps]
+        return "\n".join(lines)
+
+
+# === Prompting and parsing ===
+def _shape(annotation):
+    """A compact example of the JSON expected for `annotation`, for the prompt."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Annotated:
+        return _shape(args[0])
+    if origin is Literal:
+        return "|".join(args)
+    if origin is list:
+        return [_shape(args[0])]
+    if origin in (Union, types.UnionType):
+        return f"{_shape(next(a for a in args if a is not type(None)))} or null"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: _shape(field.annotation) for name, field in annotation.model_fields.items() if not field.exclude}
+    return "string"
+
+
+def json_instructions(model: type[Report]) -> str:
+    return (
+        "\n    Respond with only a JSON object of this shape, without code fences:\n    "
+        + json.dumps(_shape(model))
+        + "\n"
+    )
+
+
+def parse_report(model: type[Report], output) -> Report:
+    """`output` (model JSON text, a cached dict or a model) as `model`; unparseable text becomes its main field."""
+    if isinstance(output, model):
+        return output
+    if isinstance(output, dict):
+        return model.model_validate(output)
+    text = _FENCE.sub("", str(output or ""))
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return model.model_validate_json(text[start:end + 1])
+        except ValueError:
+            pass
+    return model.from_text(text)
+
+
+def compact(report: Report | None) -> str:
+    return report.compact() if report is not None else ""
+
+
+# === Streaming ===
+_PARTIAL_LITERAL = re.compile(r"(?<=[:,\[])\s*[^\s,:\[\]{}\"]+$")
+_DANGLING_KEY = re.compile(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+class PartialJSON:
+    """Incrementally scans a JSON object as it streams in and closes it into a parseable value on demand."""
+
+    def __init__(self):
+        self.text = ""
+        self._stack: list[tuple[str, int]] = []  # open "{" / "[" and where they start
+        self._in_string = False
+        self._escape = False
+        self._complete = False
+
+    def feed(self, delta: str) -> None:
+        if self._complete:
+            return
+        offset = len(self.text)
+        if not self.text:
+            start = delta.find("{")
+            if start == -1:
+                return  # still before the object (e.g. a code fence)
+            delta, offset = delta[start:], 0
+        self.text += delta
+        for i, c in enumerate(delta, offset):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._stack.append((c, i))
+            elif c in "}]" and self._stack:
+                self._stack.pop()
+                if not self._stack:
+                    self.text, self._complete = self.text[:i + 1], True
+                    return
+
+    def value(self):
+        """The object so far, leaving out list items that are still incomplete objects; None if unparseable."""
+        if not self.text:
+            return None
+        text, stack, in_string = self.text, self._stack, self._in_string
+        for depth in range(1, len(stack)):
+            if stack[depth][0] == "{" and stack[depth - 1][0] == "[":
+                text, stack, in_string = text[:stack[depth][1]], stack[:depth], False
+                break
+        if in_string:
+            if self._escape and text is self.text:
+                text = text[:-1]
+            text = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", text) + '"'
+        closers = "".join("}" if c == "{" else "]" for c, _ in reversed(stack))
+        for fix in (None, _PARTIAL_LITERAL, _DANGLING_KEY):
+            if fix is not None:
+                text = fix.sub("", text)
+            try:
+                return json.loads(text.rstrip().rstrip(",") + closers)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+
+class MarkdownStream:
+    """
+    Token sink adapter: feeds a streamed JSON reply into `model` and forwards the new part
+    of its markdown rendering. Output is only forwarded while the rendering grows as a
+    prefix of what was already sent; the rest arrives with the final report.
+    """
+
+    def __init__(self, model: type[Report], sink):
+        self.model = model
+        self.sink = sink
+        self.sent = ""
+        self._json = PartialJSON()
+
+    def __call__(self, delta: str) -> None:
+        self._json.feed(delta)
+        value = self._json.value()
+        if not isinstance(value, dict):
+            return
+        try:
+            markdown = self.model.model_validate(value).markdown()
+        except ValidationError:
+            return
+        if len(markdown) > len(self.sent) and markdown.startswith(self.sent):
+            self.sink(markdown[len(self.sent):])
+            self.sent = markdown
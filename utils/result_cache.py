@@ -0,0 +1,61 @@
+import re
+import json
+import hashlib
+from utils.cache import TTLCache
+from utils.model_setup import setting
+
+RESULT_CACHE_TTL = setting("RESULT_CACHE_TTL", 24 * 3600)
+RESULT_CACHE_MAX_BYTES = setting("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024, int)
+
+RESEARCH_CACHE_TTL = setting("RESEARCH_CACHE_TTL", 12 * 3600)
+
+_result_cache = None
+_research_cache = None
+
+
+def get_result_cache() -> TTLCache:
+    """Process-wide cache of full workflow results, backed by SQLite so it is shared across sessions."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = TTLCache("workflow_results", ttl=RESULT_CACHE_TTL, max_disk_bytes=RESULT_CACHE_MAX_BYTES)
+    return _result_cache
+
+
+def get_research_cache() -> TTLCache:
+    """Per-holding / per-sector research shared by every portfolio; entries stay fresh for RESEARCH_CACHE_TTL."""
+    global _research_cache
+    if _research_cache is None:
+        _research_cache = TTLCache("research", ttl=RESEARCH_CACHE_TTL)
+    return _research_cache
+
+
+def research_key(kind: str, subject: str, model_name: str, prompt_version: str) -> str:
+    """Research is reused across portfolios, but never across models or prompt versions."""
+    subject = re.sub(r"\s+", " ", subject).strip().lower()
+    return f"{model_name}:{prompt_version}:{kind}:{subject}"
+
+
+def normalize_portfolio(portfolio_data: str) -> str:
+    """
+    Canonical form of a portfolio: the parsed holdings sorted by asset when every row
+    can be read, otherwise the text with whitespace collapsed. A row the parser skipped
+    must not let two different portfolios share a key.
+    """
+    from utils.portfolio_metrics import parse_holdings
+
+    text = re.sub(r"\s+", " ", portfolio_data).strip()
+    try:
+        holdings = parse_holdings(portfolio_data)
+    except ValueError:
+        return text
+    if holdings.attrs.get("skipped_rows"):
+        return text
+    numeric = ["quantity", "cost_basis", "current_value"]
+    holdings[numeric] = holdings[numeric].astype(float)  # "2000" and "2000.0" are the same value
+    holdings = holdings.sort_values(["asset", "current_value"]).round(4)
+    return holdings.to_json(orient="values")
+
+
+def result_key(portfolio_data: str, model_name: str, prompt_version: str) -> str:
+    payload = json.dumps([normalize_portfolio(portfolio_data), model_name, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
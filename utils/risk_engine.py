@@ -0,0 +1,250 @@
+"""
+Vectorized historical risk for portfolios, computed from local price history.
+
+Prices are read once from PRICE_HISTORY (CSV or Parquet). Both wide files (a date column plus
+one close column per ticker) and long files (date, ticker, close) are accepted. The daily
+returns matrix is then written next to the cache as a Fortran-ordered .npy file and
+memory-mapped on later loads, so a large universe costs little RAM. Each ticker's column is
+contiguous on disk.
+
+`RiskEngine.analyze_many` scores any number of portfolios against the shared returns
+matrix, batching portfolios that hold the same tickers; each set of holdings is measured
+over the dates all of its tickers (and the benchmark) trade. It returns per-holding volatility and beta, the covariance/correlation
+of the holdings, and portfolio volatility, historical VaR/CVaR and beta.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from utils.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_PRICE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prices.csv")
+
+PERIODS_PER_YEAR = 252
+CONFIDENCE_LEVELS = (0.95, 0.99)
+MIN_OBSERVATIONS = 60
+TOP_CORRELATIONS = 5
+
+
+# === Loading ===
+def _read_prices(path: str) -> pd.DataFrame:
+    """Close prices as a date x ticker frame, from a wide or long CSV/Parquet file."""
+    df = pd.read_parquet(path) if path.endswith((".parquet", ".pq")) else pd.read_csv(path)
+    columns = {c.lower(): c for c in df.columns}
+    date = columns.get("date") or df.columns[0]
+    if "ticker" in columns and ("close" in columns or "adj close" in columns):
+        close = columns.get("adj close") or columns["close"]
+        df = df.pivot_table(index=date, columns=columns["ticker"], values=close)
+    else:
+        df = df.set_index(date)
+    df.index = pd.to_datetime(df.index)
+    df.columns = [str(c).strip().upper() for c in df.columns]
+    return df.sort_index().apply(pd.to_numeric, errors="coerce")
+
+
+def load_returns(path: str, cache_dir: str | None = None) -> tuple[np.ndarray, list[str], str]:
+    """
+    Daily simple returns (observations x tickers, NaN where a ticker has no price), the
+    tickers, and a version hash of the source file. The matrix is memory-mapped from a
+    cached .npy built on first load.
+    """
+    stat = os.stat(path)
+    version = hashlib.sha256(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    matrix_path = os.path.join(cache_dir, f"returns-{version}.npy")
+    tickers_path = os.path.join(cache_dir, f"returns-{version}.json")
+
+    if not (os.path.exists(matrix_path) and os.path.exists(tickers_path)):
+        prices = _read_prices(path)
+        returns = prices.pct_change(fill_method=None).iloc[1:]
+        np.save(matrix_path, np.asfortranarray(returns.to_numpy(dtype=np.float64)))
+        with open(tickers_path, "w", encoding="utf-8") as f:
+            json.dump(list(returns.columns), f)
+
+    with open(tickers_path, encoding="utf-8") as f:
+        tickers = json.load(f)
+    return np.load(matrix_path, mmap_mode="r"), tickers, version
+
+
+# === Engine ===
+class RiskEngine:
+    def __init__(self, returns: np.ndarray, tickers: list[str], benchmark: str | None = None, version: str = ""):
+        self.returns = returns
+        self.tickers = tickers
+        self.index = {t: i for i, t in enumerate(tickers)}
+        self.benchmark = benchmark if benchmark in self.index else None
+        self.version = version
+
+    @classmethod
+    def from_file(cls, path: str, benchmark: str | None = None) -> "RiskEngine":
+        returns, tickers, version = load_returns(path)
+        return cls(returns, tickers, benchmark, version)
+
+    def _column(self, ticker) -> int | None:
+        return self.index.get(str(ticker or "").strip().upper())
+
+    def allocations(self, portfolios: list[list[dict]]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (A, columns): each portfolio's allocation (% of its value) to every ticker that has a
+        returns column, over the union of those tickers, and the returns columns they map to.
+        """
+        held = [[(self._column(h.get("ticker")), h) for h in holdings] for holdings in portfolios]
+        columns = sorted({c for holdings in held for c, _ in holdings if c is not None})
+        position = {c: i for i, c in enumerate(columns)}
+        A = np.zeros((len(portfolios), len(columns)))
+        for p, holdings in enumerate(held):
+            for column, h in holdings:
+                if column is not None:
+                    A[p, position[column]] += h["allocation_pct"] or 0.0
+        return A, np.asarray(columns, dtype=int)
+
+    def _window(self, columns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (kept, rows): which of `columns` have enough history, and the dates on which all kept
+        assets (and the benchmark, when it has enough history) trade. Assets are dropped,
+        shortest history first, until that common window holds MIN_OBSERVATIONS returns;
+        missing returns are never filled in.
+        """
+        finite = np.isfinite(np.asarray(self.returns[:, columns]))
+        counts = finite.sum(axis=0)
+        kept = counts >= MIN_OBSERVATIONS
+        rows = np.ones(len(finite), dtype=bool)
+        if self.benchmark:
+            bench = np.isfinite(np.asarray(self.returns[:, self.index[self.benchmark]]))
+            if bench.sum() >= MIN_OBSERVATIONS:
+                rows = bench
+        while kept.any():
+            window = rows & finite[:, kept].all(axis=1)
+            if window.sum() >= MIN_OBSERVATIONS:
+                return kept, window
+            kept[np.flatnonzero(kept)[np.argmin(counts[kept])]] = False
+        return kept, np.zeros(len(finite), dtype=bool)
+
+    def analyze_many(self, portfolios: list[list[dict]]) -> list[dict | None]:
+        """
+        Risk figures for each portfolio's holdings (metrics["holdings"] rows). Portfolios
+        holding the same set of tickers are scored together in one batched pass over their
+        common window, so a portfolio's figures never depend on what else is in the batch.
+        Holdings without enough history are left out, and `coverage_pct` says how much of
+        the portfolio's value the figures cover.
+        """
+        A, columns = self.allocations(portfolios)
+        groups: dict[tuple, list[int]] = {}
+        for p in range(len(portfolios)):
+            held = tuple(np.flatnonzero(A[p]))
+            if held:
+                groups.setdefault(held, []).append(p)
+
+        results: list[dict | None] = [None] * len(portfolios)
+        for held, members in groups.items():
+            held = np.asarray(held)
+            kept, rows = self._window(columns[held])
+            if not kept.any():
+                continue
+            covered = A[np.ix_(members, held[kept])]
+            coverage = covered.sum(axis=1)
+            excluded = [self.tickers[c] for c in columns[held[~kept]]]
+            scored = self._analyze_group(columns[held[kept]], covered / coverage[:, None], rows)
+            for p, share, result in zip(members, coverage, scored):
+                results[p] = {"coverage_pct": round(float(share), 2), "short_history": excluded, **result}
+        return results
+
+    def _analyze_group(self, columns: np.ndarray, W: np.ndarray, rows: np.ndarray) -> list[dict]:
+        """Figures for portfolios (rows of W) that all hold exactly the assets in `columns`, over the dates `rows`."""
+        R = np.asarray(self.returns[:, columns])[rows]
+        bench = np.asarray(self.returns[:, self.index[self.benchmark]])[rows] if self.benchmark else None
+        if bench is not None and not np.isfinite(bench).all():
+            bench = None  # the benchmark's own history is too short for a beta
+        T = len(R)
+        annual = np.sqrt(PERIODS_PER_YEAR)
+
+        cov = np.cov(R, rowvar=False, ddof=1).reshape(len(columns), len(columns))
+        asset_vol = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(asset_vol, asset_vol)
+
+        P = R @ W.T                                                    # observations x portfolios
+        port_vol = P.std(axis=0, ddof=1)                               # = sqrt(w Σ wᵀ) over the same window
+        ordered = np.sort(P, axis=0)
+        var, cvar = {}, {}
+        for level in CONFIDENCE_LEVELS:
+            k = max(1, int(np.ceil((1 - level) * T)))
+            var[level] = -ordered[k - 1]
+            cvar[level] = -ordered[:k].mean(axis=0)
+
+        asset_beta = port_beta = None
+        if bench is not None:
+            b = bench - bench.mean()
+            bench_var = b @ b / (T - 1)
+            asset_beta = ((R - R.mean(axis=0)).T @ b) / (T - 1) / bench_var
+            port_beta = W @ asset_beta
+
+        tickers = [self.tickers[c] for c in columns]
+        upper = np.triu_indices(len(columns), 1)
+        pair_corr = corr[upper]
+        # A flat price series has no defined correlation
+        valid = np.flatnonzero(np.isfinite(pair_corr))
+        top = valid[np.argsort(-pair_corr[valid])][:TOP_CORRELATIONS]
+        top_correlations = [[tickers[upper[0][k]], tickers[upper[1][k]], round(float(pair_corr[k]), 2)] for k in top]
+        return [{
+            "observations": int(T),
+            "benchmark": self.benchmark if bench is not None else None,
+            "volatility_pct": round(float(port_vol[p] * annual * 100), 2),
+            **{f"var_{int(l * 100)}_pct": round(float(var[l][p] * 100), 2) for l in CONFIDENCE_LEVELS},
+            **{f"cvar_{int(l * 100)}_pct": round(float(cvar[l][p] * 100), 2) for l in CONFIDENCE_LEVELS},
+            "beta": round(float(port_beta[p]), 2) if port_beta is not None else None,
+            "holdings": [
+                {"ticker": t, "weight_pct": round(float(W[p, i] * 100), 2),
+                 "volatility_pct": round(float(asset_vol[i] * annual * 100), 2),
+                 "beta": round(float(asset_beta[i]), 2) if asset_beta is not None else None}
+                for i, t in enumerate(tickers)
+            ],
+            "top_correlations": top_correlations,
+        } for p in range(len(W))]
+
+    def analyze(self, metrics: dict | None) -> dict | None:
+        if not metrics:
+            return None
+        return self.analyze_many([metrics["holdings"]])[0]
+
+
+def format_risk(risk: dict) -> str:
+    """Render risk figures as compact text for the RiskAgent prompt."""
+    levels = ", ".join(
+        f"VaR {int(l * 100)}% {risk[f'var_{int(l * 100)}_pct']}% / CVaR {risk[f'cvar_{int(l * 100)}_pct']}%"
+        for l in CONFIDENCE_LEVELS
+    )
+    lines = [
+        f"Historical window: {risk['observations']} daily returns, covering {risk['coverage_pct']}% of portfolio value",
+    ]
+    if risk.get("short_history"):
+        lines.append("Left out for too little price history: " + ", ".join(risk["short_history"]))
+    lines += [
+        f"Annualized volatility: {risk['volatility_pct']}%",
+        f"1-day historical {levels}",
+    ]
+    if risk["beta"] is not None:
+        lines.append(f"Beta vs {risk['benchmark']}: {risk['beta']}")
+    if risk["top_correlations"]:
+        lines.append("Most correlated pairs: " + ", ".join(f"{a}/{b} {c}" for a, b, c in risk["top_correlations"]))
+    lines.append("ticker|weight%|vol%|beta")
+    lines.extend(f"{h['ticker']}|{h['weight_pct']}|{h['volatility_pct']}|{h['beta']}" for h in risk["holdings"])
+    return "\n".join(lines)
+
+
+_risk_engine = None
+
+
+def get_risk_engine() -> RiskEngine | None:
+    """Process-wide engine over PRICE_HISTORY (default data/prices.csv), or None without price data."""
+    global _risk_engine
+    if _risk_engine is None:
+        from utils.model_setup import load_env
+        load_env()
+        path = os.getenv("PRICE_HISTORY", DEFAULT_PRICE_FILE)
+        if not os.path.exists(path):
+            return None
+        _risk_engine = RiskEngine.from_file(path, benchmark=os.getenv("RISK_BENCHMARK", "SPY").upper())
+    return _risk_engine
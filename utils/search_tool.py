@@ -1,52 +1,215 @@
 import os
-import requests
-from dotenv import load_dotenv
-from agents import function_tool
+import re
+import time
+import random
+import asyncio
+import weakref
+from utils.cache import TTLCache
+from utils.instrumentation import get_tracer
+from utils.model_setup import load_env, setting
+from utils.rate_limiter import get_limiter
+
+SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Shared by every GoogleSearchTool in the process so agents reuse each other's results
+_search_cache = None
+
+
+def get_search_cache() -> TTLCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = TTLCache("google_search", ttl=setting("SEARCH_CACHE_TTL", 6 * 3600))
+    return _search_cache
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and collapse whitespace so trivially different queries share a cache entry."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchAPIError(Exception):
+    """Raised for Google Search API failures; `retryable` marks transient ones."""
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
 
-load_dotenv(override=True)
 
 class GoogleSearchTool:
     """Reusable Google Search Tool for agents."""
-    def __init__(self):
+    def __init__(
+        self,
+        cache: TTLCache | None = None,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+    ):
+        import requests
+
+        load_env()
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.cse_id = os.getenv("GOOGLE_CSE_ID")
+        self.search_url = os.getenv("GOOGLE_SEARCH_URL", SEARCH_URL)
         self.num_results = 5
+        self.cache = cache if cache else get_search_cache()
+        self.connect_timeout = connect_timeout or setting("SEARCH_CONNECT_TIMEOUT", 5)
+        self.read_timeout = read_timeout or setting("SEARCH_READ_TIMEOUT", 15)
+        self.max_concurrency = max_concurrency or setting("SEARCH_MAX_CONCURRENCY", 8, int)
+        self.max_retries = max_retries if max_retries is not None else setting("SEARCH_MAX_RETRIES", 3, int)
+        self.backoff_base = setting("SEARCH_BACKOFF_BASE", 0.5)
         if not self.api_key:
             raise ValueError("Google API Key not found")
         if not self.cse_id:
             raise ValueError("Google CSE ID not found.")
 
-    def _search_impl(self, query: str) -> str:
-        f"""Internal implementation of Google Search API Call."""
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
+        self._session = requests.Session()
+        # httpx pools and asyncio semaphores are bound to the loop that created them
+        self._loop_state = weakref.WeakKeyDictionary()
+
+    def _cache_key(self, query: str) -> str:
+        return f"{self.num_results}:{normalize_query(query)}"
+
+    def _params(self, query: str) -> dict:
+        return {
             "key": self.api_key,
             "cx": self.cse_id,
             "q": query,
             "num": self.num_results
         }
 
-        try:
-            resp = requests.get(url, params = params)
-            resp.raise_for_status()
-            data = resp.json()
-
-            results = []
-            for item in data.get("items", []):
-                title = item.get("title", "No Title")
-                snippet = item.get("snippet", "No Description")
-                link = item.get("link", "")
-                results.append(f"{title}: {snippet} ({link})")
-            
-            return "\n".join(results) if results else "No result found."
-        except Exception as e:
-            return f"Google search failed: {e}"
-    
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    @staticmethod
+    def _format_results(data: dict) -> str:
+        results = []
+        for item in data.get("items", []):
+            title = item.get("title", "No Title")
+            snippet = item.get("snippet", "No Description")
+            link = item.get("link", "")
+            results.append(f"{title}: {snippet} ({link})")
+
+        return "\n".join(results) if results else "No result found."
+
+    # --- Sync path ---
+    def _fetch(self, query: str) -> str:
+        """Call the Google Search API; raises on failure so errors are never cached."""
+        import requests
+
+        limiter = get_limiter("search")
+        for attempt in range(self.max_retries + 1):
+            try:
+                limiter.acquire_sync()
+                resp = self._session.get(
+                    self.search_url,
+                    params = self._params(query),
+                    timeout = (self.connect_timeout, self.read_timeout)
+                )
+                if resp.status_code == 429:
+                    limiter.penalize()
+                if resp.status_code in RETRYABLE_STATUS:
+                    raise SearchAPIError(f"HTTP {resp.status_code}", retryable=True)
+                resp.raise_for_status()
+                return self._format_results(resp.json())
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = SearchAPIError(str(e), retryable=True)
+            except SearchAPIError as e:
+                error = e
+            if not error.retryable or attempt == self.max_retries:
+                raise error
+            time.sleep(self._backoff(attempt))
+
+    def _search_impl(self, query: str) -> str:
+        """Internal implementation of Google Search API Call, served from the cache when possible."""
+        with get_tracer().span("tool", "google_search") as span:
+            computed = []
+
+            def compute():
+                computed.append(True)
+                return self._fetch(query)
+
+            try:
+                return self.cache.get_or_set(self._cache_key(query), compute)
+            except Exception as e:
+                return f"Google search failed: {e}"
+            finally:
+                if span is not None:
+                    span.cache_hit = not computed
+
+    # --- Async path ---
+    def _async_state(self) -> tuple["httpx.AsyncClient", asyncio.Semaphore]:
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            client = httpx.AsyncClient(
+                timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits = httpx.Limits(
+                    max_connections = self.max_concurrency,
+                    max_keepalive_connections = self.max_concurrency
+                )
+            )
+            state = self._loop_state[loop] = (client, asyncio.Semaphore(self.max_concurrency))
+        return state
+
+    async def _afetch(self, query: str) -> str:
+        import httpx
+
+        client, semaphore = self._async_state()
+        limiter = get_limiter("search")
+        for attempt in range(self.max_retries + 1):
+            try:
+                await limiter.acquire()
+                async with semaphore:
+                    resp = await client.get(self.search_url, params = self._params(query))
+                if resp.status_code == 429:
+                    await limiter.apenalize()
+                if resp.status_code in RETRYABLE_STATUS:
+                    raise SearchAPIError(f"HTTP {resp.status_code}", retryable=True)
+                resp.raise_for_status()
+                return self._format_results(resp.json())
+            except httpx.TransportError as e:
+                error = SearchAPIError(str(e), retryable=True)
+            except SearchAPIError as e:
+                error = e
+            if not error.retryable or attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def _search_impl_async(self, query: str) -> str:
+        """Non-blocking counterpart of _search_impl for use inside the agents' event loop."""
+        with get_tracer().span("tool", "google_search") as span:
+            computed = []
+
+            async def compute():
+                computed.append(True)
+                return await self._afetch(query)
+
+            try:
+                return await self.cache.aget_or_set(self._cache_key(query), compute)
+            except Exception as e:
+                return f"Google search failed: {e}"
+            finally:
+                if span is not None:
+                    span.cache_hit = not computed
+
+    async def aclose(self) -> None:
+        """Close the pooled client owned by the running loop."""
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].aclose()
+
     def as_tool(self):
         """Return a decorator function_tool for use in agents."""
+        from agents import function_tool
+
         @function_tool
-        def google_search(query: str) -> str:
+        async def google_search(query: str) -> str:
             """Search the web using Google Custom Search and return top results."""
-            return self._search_impl(query)
-        
-        return google_search    
\ No newline at end of file
+            return await self._search_impl_async(query)
+
+        return google_search
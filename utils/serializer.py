@@ -0,0 +1,98 @@
+import re
+import json
+import pandas as pd
+
+# === Canonical schema: field -> broker column names (lower-cased, punctuation stripped) ===
+COLUMN_ALIASES = {
+    "asset": ["asset", "name", "stock", "security", "instrument", "company", "scrip", "holding", "asset name"],
+    "ticker": ["ticker", "symbol", "trading symbol", "tradingsymbol"],
+    "asset_class": ["asset class", "asset type", "instrument type"],
+    "quantity": ["quantity", "qty", "units", "shares", "no of shares", "holding qty"],
+    "purchase_price": ["purchase price", "buy price", "avg price", "average price", "avg cost", "average cost", "cost price"],
+    "cost_basis": ["invested", "invested value", "cost", "cost basis", "purchase value", "investment", "amount invested"],
+    "current_price": ["current price", "market price", "ltp", "last price", "cmp", "price"],
+    "current_value": ["current value", "market value", "present value", "value", "current amount"],
+    "sector": ["sector", "industry"],
+}
+
+_ALIAS_TO_FIELD = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+OUTPUT_FORMATS = ("compact", "jsonl", "markdown")
+
+
+def normalize_header(name) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", str(name).lower().replace("_", " ")).strip()
+
+
+def canonical_name(column) -> str:
+    """Map a broker column name to its canonical field, or to a snake_case version of itself."""
+    normalized = normalize_header(column)
+    return _ALIAS_TO_FIELD.get(normalized) or re.sub(r"\s+", "_", normalized) or "col"
+
+
+def non_empty_columns(df: pd.DataFrame) -> set:
+    values = df.astype("string").apply(lambda s: s.str.strip())
+    return set(df.columns[(values.notna() & values.ne("") & values.ne("None")).any()])
+
+
+def plan_columns(columns, non_empty: set) -> list[tuple[str, str]]:
+    """
+    Pick (source column, canonical name) pairs: empty columns are dropped and, when
+    several columns map to the same canonical name, only the first is kept.
+    """
+    plan, used = [], set()
+    for column in columns:
+        if column not in non_empty:
+            continue
+        name = canonical_name(column)
+        if name in used:
+            continue
+        used.add(name)
+        plan.append((column, name))
+    return plan
+
+
+def _clean(value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return re.sub(r"\s+", " ", str(value)).strip().replace("|", "/")
+
+
+def serialize_table(df: pd.DataFrame, fmt: str, plan: list[tuple[str, str]], header: bool = True) -> str:
+    """
+    Render a table without padding.
+    compact: pipe-delimited rows under a canonical header line.
+    jsonl: one JSON object per row with canonical keys, empty cells omitted.
+    """
+    sources = [src for src, _ in plan]
+    names = [name for _, name in plan]
+    rows = df[sources].itertuples(index=False, name=None)
+    if fmt == "compact":
+        lines = ["|".join(names)] if header else []
+        lines.extend("|".join(_clean(v) for v in row) for row in rows)
+        return "\n".join(lines)
+    if fmt == "jsonl":
+        return "\n".join(
+            json.dumps({k: c for k, c in zip(names, map(_clean, row)) if c}, ensure_ascii=False, separators=(",", ":"))
+            for row in rows
+        )
+    raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, otherwise the usual ~4 characters per token estimate."""
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def estimate_markdown_tokens(df: pd.DataFrame) -> int:
+    """Approximate token count of df.to_markdown(index=False), from column widths and row count, without rendering it."""
+    if df.empty:
+        return count_tokens(" | ".join(map(str, df.columns)))
+    # Missing values in string columns have no length; they render as about four characters
+    widths = [max(len(str(c)), int(df[c].astype(str).str.len().fillna(4).max())) for c in df.columns]
+    chars = (len(df) + 2) * (sum(widths) + 3 * len(widths) + 1)
+    return (chars + 3) // 4
@@ -0,0 +1,86 @@
+"""
+Measure cold-start cost against a budget.
+
+    python -m utils.startup_budget
+
+Reports the time to import `manager` in a fresh interpreter and the time for
+the first workflow setup (graph compile + building every agent), and exits
+non-zero when either exceeds its budget. Budgets are in seconds and can be
+overridden with STARTUP_IMPORT_BUDGET / STARTUP_FIRST_RUN_BUDGET.
+
+Setup makes no API calls, so missing API keys are replaced with placeholders for the
+measurement. Most of the first-run time is importing the Agents SDK and LangGraph;
+setup must not import pandas (only portfolio parsing and conversion need it).
+"""
+import os
+import sys
+import time
+import subprocess
+from utils.model_setup import setting
+
+IMPORT_BUDGET = setting("STARTUP_IMPORT_BUDGET", 0.5)
+FIRST_RUN_BUDGET = setting("STARTUP_FIRST_RUN_BUDGET", 5.0)
+
+CREDENTIALS = ("GEMINI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID")
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import manager; print(time.perf_counter() - t)"
+
+_FIRST_RUN_SNIPPET = """
+import sys
+import time
+from manager import PortfolioWorkflow
+t = time.perf_counter()
+workflow = PortfolioWorkflow()
+workflow.workflow
+workflow.agents.warm()
+elapsed = time.perf_counter() - t
+assert "pandas" not in sys.modules, "workflow setup imported pandas"
+print(elapsed)
+"""
+
+
+def _environment() -> tuple[dict, list[str]]:
+    """The environment for the measurements, with placeholders for missing API keys, and the keys that were missing."""
+    from utils.model_setup import load_env
+
+    load_env()
+    missing = [name for name in CREDENTIALS if not os.getenv(name)]
+    return {**os.environ, **{name: "placeholder" for name in missing}}, missing
+
+
+def _measure(snippet: str, env: dict) -> float:
+    """Seconds reported by `snippet` in a fresh interpreter; raises RuntimeError with its last error line on failure."""
+    out = subprocess.run(
+        [sys.executable, "-c", snippet],
+        capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if out.returncode:
+        lines = out.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit status {out.returncode}")
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    env, missing = _environment()
+    if missing:
+        print(f"Using placeholder values for missing credentials: {', '.join(missing)}")
+    failed = False
+    for name, snippet, budget in [
+        ("import manager", _IMPORT_SNIPPET, IMPORT_BUDGET),
+        ("first run setup", _FIRST_RUN_SNIPPET, FIRST_RUN_BUDGET),
+    ]:
+        try:
+            elapsed = _measure(snippet, env)
+        except RuntimeError as e:
+            failed = True
+            print(f"{name:<16} FAILED: {e}")
+            continue
+        status = "OK" if elapsed <= budget else "OVER BUDGET"
+        failed = failed or elapsed > budget
+        print(f"{name:<16} {elapsed:7.3f}s  (budget {budget:.3f}s)  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
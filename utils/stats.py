@@ -0,0 +1,6 @@
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of `values` (any order); 0.0 when there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,169 @@
+import os
+import re
+import csv
+import hashlib
+from typing import NamedTuple
+from collections import defaultdict
+import pandas as pd
+
+DEFAULT_SYMBOLS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "symbols.csv")
+
+FUZZY_THRESHOLD = 0.7
+TOKEN_THRESHOLD = 0.5  # trigram similarity at which two words count as the same word with a typo
+
+_SUFFIXES = re.compile(
+    r"\b(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|lp|sa|ag|nv|the|class [a-c]|ord|shares?)\b"
+)
+
+_CONNECTIVES = {"and", "of", "for"}
+
+
+class Symbol(NamedTuple):
+    ticker: str
+    name: str
+    sector: str
+    asset_class: str
+
+
+def normalize_name(text) -> str:
+    """Lower-case, drop punctuation and corporate suffixes: "Apple Inc." -> "apple"."""
+    text = str(text).lower().replace("&", " and ")
+    text = re.sub(r"[^a-z0-9 ]", " ", text)
+    text = _SUFFIXES.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: set[str], b: set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _same_word(a: str, b: str) -> bool:
+    """Equal, or close enough to be a typo; numbers must match exactly ("500" is not "100")."""
+    if a == b:
+        return True
+    if any(c.isdigit() for c in a + b):
+        return False
+    return _dice(_trigrams(a), _trigrams(b)) >= TOKEN_THRESHOLD
+
+
+def _covers(words: list[str], other: list[str]) -> bool:
+    return all(any(_same_word(w, o) for o in other) for w in words if w not in _CONNECTIVES)
+
+
+class SymbolIndex:
+    """
+    Local ticker / asset-name index loaded from a reference CSV
+    (ticker, name, aliases separated by ';', sector, asset_class).
+    Lookup order: exact ticker, exact name or alias, then trigram fuzzy match. A fuzzy
+    match must also pair every word of the query with a word of the name and vice versa,
+    so "Reliance Power" or "Coca Cola Consolidated" do not resolve to a different company.
+    """
+
+    def __init__(self, path: str | None = None, fuzzy_threshold: float = FUZZY_THRESHOLD):
+        self.path = path or os.getenv("SYMBOLS_FILE", DEFAULT_SYMBOLS_FILE)
+        self.fuzzy_threshold = fuzzy_threshold
+        self._by_ticker: dict[str, Symbol] = {}
+        self._by_name: dict[str, Symbol] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._postings: dict[str, list[str]] = defaultdict(list)
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        self.version = hashlib.sha256(raw).hexdigest()[:12]
+        for row in csv.DictReader(raw.decode("utf-8").splitlines()):
+            symbol = Symbol(row["ticker"].strip(), row["name"].strip(), row["sector"].strip(), row["asset_class"].strip())
+            self._by_ticker[symbol.ticker.upper()] = symbol
+            for alias in [symbol.name, *row.get("aliases", "").split(";")]:
+                key = normalize_name(alias)
+                if key and key not in self._by_name:
+                    self._by_name[key] = symbol
+                    self._grams[key] = grams = _trigrams(key)
+                    for gram in grams:
+                        self._postings[gram].append(key)
+
+    def __len__(self) -> int:
+        return len(self._by_ticker)
+
+    def lookup(self, query) -> Symbol | None:
+        query = str(query).strip()
+        if not query:
+            return None
+        symbol = self._by_ticker.get(query.upper())
+        if symbol is not None:
+            return symbol
+        key = normalize_name(query)
+        return self._by_name.get(key) or self._fuzzy(key)
+
+    def _fuzzy(self, key: str) -> Symbol | None:
+        """Dice similarity over character trigrams, scored only against names sharing a trigram."""
+        if not key:
+            return None
+        grams = _trigrams(key)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                overlap[candidate] += 1
+        scored = sorted(
+            ((2 * shared / (len(grams) + len(self._grams[candidate])), candidate) for candidate, shared in overlap.items()),
+            reverse=True,
+        )
+        words = key.split()
+        for score, candidate in scored:
+            if score < self.fuzzy_threshold:
+                break
+            if _covers(words, candidate.split()) and _covers(candidate.split(), words):
+                return self._by_name[candidate]
+        return None
+
+    def enrich(self, df: pd.DataFrame, asset_column, ticker_column=None, sector_column=None,
+               asset_class_column=None) -> pd.DataFrame:
+        """
+        Attach resolved ticker, sector and asset_class columns to a holdings table.
+        Existing ticker / sector / asset class values are kept; only blanks (including NaN) are filled in.
+        Each distinct asset name is resolved once.
+        """
+        df = df.copy()
+
+        def blank(column):
+            return df[column].isna() | df[column].astype(str).str.strip().isin(["", "None", "nan"])
+
+        queries = df[ticker_column].where(~blank(ticker_column), df[asset_column]) \
+            if ticker_column is not None else df[asset_column]
+        resolved = {q: self.lookup(q) for q in pd.unique(queries.astype(str))}
+        symbols = queries.astype(str).map(resolved)
+
+        def field(name):
+            return symbols.map(lambda s: getattr(s, name) if s is not None else "")
+
+        def fill(column, name):
+            if column is None:
+                df[name] = field(name)
+            else:
+                df[column] = df[column].where(~blank(column), field(name))
+
+        fill(ticker_column, "ticker")
+        fill(sector_column, "sector")
+        fill(asset_class_column, "asset_class")
+        if asset_class_column is None:
+            # Keep the often-blank asset class beside the asset rather than as the trailing cell
+            df.insert(df.columns.get_loc(asset_column) + 1, "asset_class", df.pop("asset_class"))
+        return df
+
+
+_symbol_index = None
+
+
+def get_symbol_index() -> SymbolIndex | None:
+    """Process-wide index, or None when the reference file is missing."""
+    global _symbol_index
+    if _symbol_index is None:
+        try:
+            _symbol_index = SymbolIndex()
+        except FileNotFoundError:
+            return None
+    return _symbol_index
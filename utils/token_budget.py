@@ -0,0 +1,76 @@
+import re
+
+# Default per-section budgets (tokens) for context handed to the RecommendationAgent
+DEFAULT_BUDGETS = {
+    "portfolio_summary": 1500,
+    "risk_assessment": 1200,
+    "portfolio_research": 1200,
+    "risk_research": 1200,
+}
+
+# Markdown headings, bold-only lines, and short numbered / "Title:" lines such as "2. Concentration Risks"
+_HEADING = re.compile(r"^\s*(#{1,6}\s.*|\*\*[^*]+\*\*:?|\d+\.\s+[^.]{1,60}|[A-Z][A-Za-z &/-]{2,60}:)\s*$")
+_REFERENCE = re.compile(r"https?://|www\.|\(\s*source", re.IGNORECASE)
+_REFERENCES_HEADING = re.compile(r"references|sources", re.IGNORECASE)
+
+
+def compact_text(text: str, budget: int) -> str:
+    """
+    Extractively trim `text` to roughly `budget` tokens.
+    Headings and reference lines are always kept; body lines are then admitted
+    breadth-first (the first line of every section, then the second, ...) so each
+    section keeps its lead, and the kept lines are emitted in their original order.
+    """
+    # utils.serializer pulls in pandas, which workflow setup should not pay for
+    from utils.serializer import count_tokens
+
+    if count_tokens(text) <= budget:
+        return text
+
+    lines = [l for l in text.splitlines() if l.strip()]
+    keep, candidates = set(), []
+    rank, in_references = 0, False
+    for i, line in enumerate(lines):
+        if _HEADING.match(line):
+            keep.add(i)
+            rank, in_references = 0, bool(_REFERENCES_HEADING.search(line))
+        elif in_references or _REFERENCE.search(line):
+            keep.add(i)
+        else:
+            candidates.append((rank, i))
+            rank += 1
+
+    used = sum(count_tokens(lines[i]) for i in keep)
+    for _, i in sorted(candidates):
+        cost = count_tokens(lines[i])
+        if used + cost > budget:
+            continue
+        keep.add(i)
+        used += cost
+
+    return "\n".join(lines[i] for i in sorted(keep))
+
+
+class TokenBudget:
+    """Applies per-section token budgets to inter-agent context and records the resulting sizes."""
+
+    def __init__(self, budgets: dict | None = None):
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+
+    def apply(self, sections: dict) -> tuple[dict, dict]:
+        """Return (compacted sections, sizes) where sizes maps field -> original/budget/final tokens."""
+        from utils.serializer import count_tokens
+
+        compacted, sizes = {}, {}
+        for field, text in sections.items():
+            text = text or ""
+            budget = self.budgets.get(field)
+            original = count_tokens(text)
+            result = compact_text(text, budget) if budget else text
+            compacted[field] = result
+            sizes[field] = {
+                "tokens": original,
+                "budget": budget,
+                "final_tokens": count_tokens(result) if result is not text else original,
+            }
+        return compacted, sizes